@@ -1,4 +1,4 @@
-import math
+from typing import Final
 
 SCREEN_WIDTH = 160
 SCREEN_HEIGHT = 144
@@ -6,8 +6,8 @@ DISPLAY_FACTOR = 4
 
 # Cycles per frame is determined by the clock frequency of the CPU (4.194304 MHz)
 # And the number of expected frames per second (~60) - to make this accurage it should be 59.7275
-CLOCK_SPEED = 4194304
-MAX_CYCLES_PER_FRAME = math.floor(CLOCK_SPEED / 59.7275)
+CLOCK_SPEED: Final = 4194304
+MAX_CYCLES_PER_FRAME: Final = 70224  # floor(CLOCK_SPEED / 59.7275), i.e. 154 scanlines * 456 cycles
 
 PROGRAM_COUNTER_INIT = 0x100
 STACK_POINTER_INIT = 0xFFFE
@@ -19,6 +19,10 @@ TIMER_MODULATOR_ADDR = 0xFF06  # The value at this address is what the timer is
 TIMER_CONTROL_ADDR = 0xFF07
 CYCLES_PER_DIVIDER_INCREMENT = 256
 
+# Number of cycles between timer increments, indexed by bits 0 and 1 of the TAC (Timer control) register
+# These are CLOCK_SPEED / 4096, CLOCK_SPEED / 262144, CLOCK_SPEED / 65536, and CLOCK_SPEED / 16384
+TIMER_CYCLE_PERIODS = (1024, 16, 64, 256)
+
 # LCD and Graphics
 LCD_CONTROL_ADDR = 0xFF40  # The address of the LCD control byte
 LCD_STATUS_ADDR = 0xFF41  # The address of the LCD status byte
@@ -56,12 +60,13 @@ RAM_BANK_COUNT_ADDR = 0x148
 MAXIMUM_RAM_BANKS = 4
 RAM_BANK_SIZE = 0x2000  # In bytes
 
-GB_COLORS = {
-    0: 0xFFFFFF,
-    1: 0xCCCCCC,
-    2: 0x777777,
-    3: 0x000000
-}
+# Colors indexed by the 2-bit shade from the color pallette (0 = white, 3 = black)
+GB_COLORS = (
+    0xFFFFFF,
+    0xCCCCCC,
+    0x777777,
+    0x000000
+)
 
 # Interrupts
 # Known as IE (Interrupt Enable) register, which denotes which interrupts are currently enabled
@@ -80,6 +85,9 @@ INTERRUPT_ENABLE_ADDR = 0xFFFF
 # Bit 4 = Joypad Interrupt - INT $60
 INTERRUPT_FLAG_ADDR = 0xFF0F
 
+# The address the CPU jumps to when servicing each interrupt, indexed by interrupt bit
+INTERRUPT_VECTORS = (0x40, 0x48, 0x50, 0x58, 0x60)
+
 # Joypad register - Bits are as follows:
 # Bit 7 - Not used
 # Bit 6 - Not used
@@ -90,3 +98,8 @@ INTERRUPT_FLAG_ADDR = 0xFF0F
 # Bit 1 - P11 Input: Left  or B        (0=Pressed) (Read Only)
 # Bit 0 - P10 Input: Right or A        (0=Pressed) (Read Only)
 JOYPAD_REGISTER_ADDR = 0xFF00
+
+# Serial transfer data (SB) and control (SC) registers. Writing 0x81 to the control register
+# starts a transfer of the byte in the data register
+SERIAL_TRANSFER_DATA_ADDR = 0xFF01
+SERIAL_TRANSFER_CONTROL_ADDR = 0xFF02
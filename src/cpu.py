@@ -1,90 +1,196 @@
-import logging
+import struct
 
-from enum import Enum
+from typing import Callable
 
-from constants import INTERRUPT_FLAG_ADDR, PROGRAM_COUNTER_INIT, STACK_POINTER_INIT
+from constants import INTERRUPT_FLAG_ADDR, INTERRUPT_VECTORS, PROGRAM_COUNTER_INIT, STACK_POINTER_INIT
 
 from ops import OpCode, Operation, opcodes_map, prefix_opcodes_map
+from interrupts import InterruptControl
 from mmu import Mmu
-from ppu import Ppu
-from timers import TimerControl
-from utils import Interrupt, bit_negate, get_bit_val, is_bit_set, reset_bit, set_bit
-
-
-logger = logging.getLogger(__name__)
+from scheduler import Scheduler
+from utils import Interrupt
+
+
+# Reads a little endian word from a buffer at an offset
+unpack_word = struct.Struct('<H').unpack_from
+
+
+# Indexes of the 8-bit registers in Cpu.registers. These follow the order the
+# registers are encoded in opcodes (B, C, D, E, H, L, (HL), A) with F in the
+# slot that (HL) would take
+REG_B = 0
+REG_C = 1
+REG_D = 2
+REG_E = 3
+REG_H = 4
+REG_L = 5
+REG_F = 6
+REG_A = 7
+
+# The F register contains flags for the CPU. The following bits
+# represent the following flags:
+#
+# 7	z	Zero flag
+# 6	n	Subtraction flag (BCD)
+# 5	h	Half Carry flag (BCD)
+# 4	c	Carry flag
+#
+# These are the masks for each flag within the register
+FLAG_ZERO = 0x80
+FLAG_SUBTRACTION = 0x40
+FLAG_HALF_CARRY = 0x20
+FLAG_CARRY = 0x10
+
+# The flag tested by each condition code (NZ, Z, NC, C)
+CONDITION_FLAGS = (FLAG_ZERO, FLAG_ZERO, FLAG_CARRY, FLAG_CARRY)
+
+# The (high, low) registers PUSH and POP use, selected by bits 4-5 of the opcode (BC, DE, HL, AF)
+STACK_REGISTER_PAIRS = ((REG_B, REG_C), (REG_D, REG_E), (REG_H, REG_L), (REG_A, REG_F))
+
+# Every byte read as a signed offset (-128 to 127), for the relative jumps and SP arithmetic
+SIGNED_BYTES = tuple(val - 256 if val > 127 else val for val in range(256))
+
+# Every byte as 2 hex digits, for the debug log
+HEX_BYTES = tuple(f'{val:02X}' for val in range(256))
+
+
+def _build_alu_table(subtract: bool) -> "tuple[int, ...]":
+    '''
+    Precompute the result and flags of every 8-bit add (or subtract) the CPU can do. The
+    table is indexed by (carry << 16) | (a << 8) | b and each entry is (flags << 8) | result
 
+    :return a tuple of 131072 packed results
+    '''
 
-class RegisterPair:
+    table = []
+
+    for carry in range(2):
+        for a in range(256):
+            for b in range(256):
+                if subtract:
+                    res = a - b - carry
+                    half_carry = (a & 0xF) < (b & 0xF) + carry
+                    full_carry = res < 0
+                else:
+                    res = a + b + carry
+                    half_carry = (a & 0xF) + (b & 0xF) + carry > 0xF
+                    full_carry = res > 0xFF
+
+                res &= 0xFF
+                flags = (
+                    (FLAG_ZERO if res == 0 else 0)
+                    | (FLAG_SUBTRACTION if subtract else 0)
+                    | (FLAG_HALF_CARRY if half_carry else 0)
+                    | (FLAG_CARRY if full_carry else 0)
+                )
+
+                table.append((flags << 8) | res)
+
+    return tuple(table)
+
+
+ADD_TABLE = _build_alu_table(False)
+SUB_TABLE = _build_alu_table(True)
+
+# The zero, subtraction and half carry flags after an 8-bit increment or decrement, indexed by
+# the result. The carry flag is not affected by either
+INC_FLAGS = tuple(
+    (FLAG_ZERO if val == 0 else 0) | (FLAG_HALF_CARRY if val & 0xF == 0 else 0)
+    for val in range(256)
+)
+DEC_FLAGS = tuple(
+    (FLAG_ZERO if val == 0 else 0) | FLAG_SUBTRACTION | (FLAG_HALF_CARRY if val & 0xF == 0xF else 0)
+    for val in range(256)
+)
+
+
+def _build_daa_table() -> "tuple[int, ...]":
     '''
-    Denotes a register pair such as BC or DE
-    Remember, Gameboy is Little Endian so treat all data as lo byte (i.e. C) first
-    and hi byte (i.e. B) second
+    Precompute the DAA adjustment for every value of A and F. This should adjust the value in
+    register A so that it is a proper BCD representation, where the value SHOULD be the result
+    of a previous ADD or SUB of two BCD numbers. The low nibble of F is always 0, so the table is
+    indexed by (F << 4) | A and each entry is (flags << 8) | result
+
+    :return a tuple of 4096 packed results
     '''
 
-    def __init__(self, name):
-        self.name = name
-        self.lo = 0
-        self.hi = 0
+    table = []
 
-    @property
-    def value(self):
-        return ((self.hi << 8) | self.lo) & 0xFFFF
+    for flags in range(0, 0x100, 0x10):
+        for val in range(256):
+            # The subtraction flag is kept, half carry is always cleared and carry is recomputed
+            new_flags = flags & FLAG_SUBTRACTION
 
-    @value.setter
-    def value(self, value):
-        self.hi = value >> 8
-        self.lo = value & 0xFF
+            if not flags & FLAG_SUBTRACTION:
+                if flags & FLAG_CARRY or val > 0x99:
+                    val += 0x60
+                    new_flags |= FLAG_CARRY
 
-    def increment(self):
-        val = self.value + 1
-        if val > 0xFFFF:
-            val = 0
+                if flags & FLAG_HALF_CARRY or (val & 0x0F) > 0x09:
+                    val += 0x6
 
-        self.value = val
+            else:
+                if flags & FLAG_CARRY:
+                    val -= 0x60
+                    new_flags |= FLAG_CARRY
 
-    def decrement(self):
-        val = self.value - 1
-        if val < 0:
-            val = 0xFFFF
+                if flags & FLAG_HALF_CARRY:
+                    val -= 0x6
 
-        self.value = val
+            # Masking also wraps a negative result from the subtraction back into a byte
+            val &= 0xFF
+            if val == 0:
+                new_flags |= FLAG_ZERO
 
-    def increment_lo(self):
-        self.lo += 1
-        if self.lo > 255:
-            self.lo = 0
+            table.append((new_flags << 8) | val)
 
-    def increment_hi(self):
-        self.hi += 1
-        if self.hi > 255:
-            self.hi = 0
+    return tuple(table)
 
-    def decrement_lo(self):
-        self.lo -= 1
-        if self.lo < 0:
-            self.lo = 255
 
-    def decrement_hi(self):
-        self.hi -= 1
-        if self.hi < 0:
-            self.hi = 255
+DAA_TABLE = _build_daa_table()
 
 
-class Flags(Enum):
+def _build_rotate_table(rotate: "Callable[[int, int], tuple[int, int]]") -> "tuple[int, ...]":
     '''
-    The F register contains flags for the CPU. The following bits
-    represent the following flags:
+    Precompute the result and flags of a CB rotate or shift for every value and carry flag. The
+    rotate function is given (val, carry) and returns (result, bit shifted out). The table is
+    indexed by (carry << 8) | val and each entry is (flags << 8) | result
 
-    7	z	Zero flag
-    6	n	Subtraction flag (BCD)
-    5	h	Half Carry flag (BCD)
-    4	c	Carry flag
+    :return a tuple of 512 packed results
     '''
 
-    ZERO = 7
-    SUBTRACTION = 6
-    HALF_CARRY = 5
-    CARRY = 4
+    table = []
+
+    for carry in range(2):
+        for val in range(256):
+            res, carry_out = rotate(val, carry)
+            flags = (FLAG_ZERO if res == 0 else 0) | (FLAG_CARRY if carry_out else 0)
+            table.append((flags << 8) | res)
+
+    return tuple(table)
+
+
+# The CB rotates and shifts, by operation. RL and RR rotate through the carry flag, RLC and RRC
+# rotate the bit shifted out back in, SRA keeps the sign bit and SLA/SRL shift in a 0. SWAP
+# exchanges the nibbles and always clears the carry flag
+ROTATE_TABLES = {
+    Operation.RLC: _build_rotate_table(lambda val, carry: (((val << 1) | (val >> 7)) & 0xFF, val >> 7)),
+    Operation.RRC: _build_rotate_table(lambda val, carry: ((val >> 1) | ((val & 1) << 7), val & 1)),
+    Operation.RL: _build_rotate_table(lambda val, carry: (((val << 1) | carry) & 0xFF, val >> 7)),
+    Operation.RR: _build_rotate_table(lambda val, carry: ((val >> 1) | (carry << 7), val & 1)),
+    Operation.SLA: _build_rotate_table(lambda val, carry: ((val << 1) & 0xFF, val >> 7)),
+    Operation.SRA: _build_rotate_table(lambda val, carry: ((val >> 1) | (val & 0x80), val & 1)),
+    Operation.SRL: _build_rotate_table(lambda val, carry: (val >> 1, val & 1)),
+    Operation.SWAP: _build_rotate_table(lambda val, carry: (((val & 0xF) << 4) | (val >> 4), 0)),
+}
+
+# RLCA, RRCA, RLA and RRA rotate A the same way as the CB rotates, selected by bits 3-4 of the opcode
+A_ROTATE_TABLES = (
+    ROTATE_TABLES[Operation.RLC],
+    ROTATE_TABLES[Operation.RRC],
+    ROTATE_TABLES[Operation.RL],
+    ROTATE_TABLES[Operation.RR],
+)
 
 
 class Cpu:
@@ -100,40 +206,100 @@ class Cpu:
     There is a 2-Byte register for the Program counter and a 2-Byte register for the Stack Pointer
     '''
 
-    def __init__(self, memory: Mmu, timer: TimerControl, ppu: Ppu):
-        # Register pairs
-        self.af = RegisterPair("AF")
-        self.bc = RegisterPair("BC")
-        self.de = RegisterPair("DE")
-        self.hl = RegisterPair("HL")
+    __slots__ = (
+        'registers',
+        'program_counter',
+        'stack_pointer',
+        'memory',
+        'raw_memory',
+        'read_byte',
+        'write_byte',
+        'scheduler',
+        'interrupts',
+        'interrupts_enabled',
+        'enable_interrupts_countdown',
+        'halted',
+        'cycle_tracker',
+        'handlers',
+        'prefix_handlers',
+        'debug_file',
+    )
+
+    def __init__(self, memory: Mmu, scheduler: Scheduler, interrupts: InterruptControl):
+        # The 8-bit registers, indexed by REG_B, REG_C, etc. The register pairs are
+        # available as the af, bc, de, and hl properties
+        self.registers = bytearray(8)
 
         self.program_counter = 0
         self.stack_pointer = 0
 
         # Memory Management Unit
         self.memory = memory
-        self.timer = timer
-        self.ppu = ppu
+
+        # Raw view of the MMU's memory, used to skip read_byte for fetches that don't need mapping
+        self.raw_memory = memory.memory
+
+        # The MMU's accessors, bound once rather than looked up on every access
+        self.read_byte = memory.read_byte
+        self.write_byte = memory.write_byte
+
+        self.scheduler = scheduler
+        self.interrupts = interrupts
 
         # Interrupts
         self.interrupts_enabled = True
 
-        # Interrupt enabling/disable is delayed by one instruction
-        # so have flags to denote if we SHOULD change the value
-        self.will_enable_interrupts = False
-        self.will_disable_interrupts = False
+        # Enabling interrupts (EI) is delayed until after the next instruction. This counts
+        # down the instructions left before they are enabled, 0 when nothing is pending
+        self.enable_interrupts_countdown = 0
 
         # For HALT mode - will be disabled when an interrupt occurs
         self.halted = False
 
         self.cycle_tracker = 0
 
-        self.debug_ctr = 0
-        self.debug_set = set()
+        # Handlers indexed by opcode byte, so dispatching an instruction is a single lookup
+        self.handlers = self._build_handlers()
+        self.prefix_handlers = self._build_prefix_handlers()
 
-        self.last_opcode = None
+        # When set (see start_debug_log) the registers are logged here before every instruction
+        self.debug_file = None
 
-        self.is_debugging = False
+    @property
+    def af(self) -> int:
+        return (self.registers[REG_A] << 8) | self.registers[REG_F]
+
+    @af.setter
+    def af(self, value: int):
+        self.registers[REG_A] = (value >> 8) & 0xFF
+        self.registers[REG_F] = value & 0xFF
+
+    @property
+    def bc(self) -> int:
+        return (self.registers[REG_B] << 8) | self.registers[REG_C]
+
+    @bc.setter
+    def bc(self, value: int):
+        self.registers[REG_B] = (value >> 8) & 0xFF
+        self.registers[REG_C] = value & 0xFF
+
+    @property
+    def de(self) -> int:
+        return (self.registers[REG_D] << 8) | self.registers[REG_E]
+
+    @de.setter
+    def de(self, value: int):
+        self.registers[REG_D] = (value >> 8) & 0xFF
+        self.registers[REG_E] = value & 0xFF
+
+    @property
+    def hl(self) -> int:
+        return (self.registers[REG_H] << 8) | self.registers[REG_L]
+
+    @hl.setter
+    def hl(self, value: int):
+        self.registers[REG_H] = (value >> 8) & 0xFF
+        self.registers[REG_L] = value & 0xFF
 
     def reset(self):
         '''
@@ -143,16 +309,67 @@ class Cpu:
         self.program_counter = PROGRAM_COUNTER_INIT
         self.stack_pointer = STACK_POINTER_INIT
 
-        self.af.value = 0x01B0
-        self.bc.value = 0x0013
-        self.de.value = 0x00D8
-        self.hl.value = 0x014D
+        self.af = 0x01B0
+        self.bc = 0x0013
+        self.de = 0x00D8
+        self.hl = 0x014D
 
         self.halted = False
-        self.will_enable_interrupts = False
-        self.will_disable_interrupts = False
+        self.enable_interrupts_countdown = 0
         self.interrupts_enabled = True
 
+    def run_frame(self, max_cycles: int) -> int:
+        '''
+        Execute instructions, servicing interrupts between them, until at least max_cycles have
+        elapsed. Keeping the loop here avoids a round trip through PyBoy for every instruction
+
+        :return the number of cycles executed
+        '''
+
+        # This loop runs for every instruction, so look up everything it needs once, up front
+        opcodes = opcodes_map
+        handlers = self.handlers
+        fetch_byte = self._fetch_byte
+        toggle_interrupts_enabled = self._toggle_interrupts_enabled
+        add_cycles = self.scheduler.add_cycles
+        get_servicable_interrupt = self.interrupts.get_servicable_interrupt
+        service_interrupt = self.service_interrupt
+        is_debugging = self.debug_file is not None
+
+        frame_cycles = 0
+        while frame_cycles < max_cycles:
+            if self.halted:
+                frame_cycles += self._skip_halted_cycles(max_cycles - frame_cycles)
+            else:
+                # This is the same as execute
+                if is_debugging:
+                    self._debug()
+
+                self.cycle_tracker = 0
+
+                program_counter = self.program_counter
+                op = fetch_byte(program_counter)
+                opcode = opcodes[op]
+                self.program_counter = (program_counter + 1) & 0xFFFF
+
+                cycles = handlers[op](opcode)
+
+                # Only EI schedules a change, so skip the call for everything else
+                if self.enable_interrupts_countdown:
+                    toggle_interrupts_enabled()
+
+                add_cycles(cycles - self.cycle_tracker)
+                frame_cycles += cycles
+
+            interrupt = get_servicable_interrupt()
+            if interrupt is not None:
+                service_interrupt(interrupt)
+
+        # Make sure the display and timers are caught up by the end of the frame
+        self.scheduler.sync()
+
+        return frame_cycles
+
     def execute(self) -> int:
         '''
         Get the next operation from memory, decode, and execute
@@ -160,15 +377,14 @@ class Cpu:
         :return the number of cycles the operation took
         '''
 
+        if self.debug_file is not None:
+            self._debug()
+
         self.cycle_tracker = 0
 
-        op = self._read_memory(self.program_counter)
+        op = self._fetch_byte(self.program_counter)
         opcode = opcodes_map[op]
 
-        if self.debug_ctr < 161502:
-            # self._debug()
-            self.debug_ctr += 1
-
         # If in HALT mode, effectively stop the clock by not returning any cycles
         if self.halted:
             self._sync_cycles(4)
@@ -176,63 +392,692 @@ class Cpu:
 
         self.program_counter = (self.program_counter + 1) & 0xFFFF
 
-        cycles = 0
-
-        # if opcode.code == 0xAF and self.last_opcode.code == 0xF5:
-        #     self.is_debugging = True
-
-        # if self.is_debugging:
-        #     breakpoint()
-
-        # match opcode.operation:
-        if opcode.operation == Operation.ADC: cycles = self._do_add_8_bit(opcode, with_carry=True)
-        elif opcode.operation == Operation.ADD: cycles = self._do_add_8_bit(opcode)
-        elif opcode.operation == Operation.ADD_16_BIT: cycles = self._do_add_16_bit(opcode)
-        elif opcode.operation == Operation.AND: cycles = self._do_and(opcode)
-        elif opcode.operation == Operation.CALL: cycles = self._do_call(opcode)
-        elif opcode.operation == Operation.CCF: cycles = self._do_complement_carry(opcode)
-        elif opcode.operation == Operation.CP: cycles = self._do_compare(opcode)
-        elif opcode.operation == Operation.CPL: cycles = self._do_complement(opcode)
-        elif opcode.operation == Operation.DAA: cycles = self._do_daa(opcode)
-        elif opcode.operation == Operation.DEC: cycles = self._do_decrement_8_bit(opcode)
-        elif opcode.operation == Operation.DEC_16_BIT: cycles = self._do_decrement_16_bit(opcode)
-        elif opcode.operation == Operation.DI: cycles = self._do_disable_interrupts(opcode)
-        elif opcode.operation == Operation.EI: cycles = self._do_enable_interrupts(opcode)
-        elif opcode.operation == Operation.HALT: cycles = self._do_halt(opcode)
-        elif opcode.operation == Operation.INC: cycles = self._do_increment_8_bit(opcode)
-        elif opcode.operation == Operation.INC_16_BIT: cycles = self._do_increment_16_bit(opcode)
-        elif opcode.operation == Operation.JP: cycles = self._do_jump(opcode)
-        elif opcode.operation == Operation.JR: cycles = self._do_jump_relative(opcode)
-        elif opcode.operation == Operation.LD: cycles = self._do_load(opcode)
-        elif opcode.operation == Operation.LDH: cycles = self._do_load_h(opcode)
-        elif opcode.operation == Operation.NOP: cycles = opcode.cycles
-        elif opcode.operation == Operation.OR: cycles = self._do_or(opcode)
-        elif opcode.operation == Operation.POP: cycles = self._do_pop(opcode)
-        elif opcode.operation == Operation.PREFIX: cycles = self._do_prefix()
-        elif opcode.operation == Operation.PUSH: cycles = self._do_push(opcode)
-        elif opcode.operation == Operation.RET: cycles = self._do_return(opcode)
-        elif opcode.operation == Operation.RETI: cycles = self._do_return(opcode)
-        elif opcode.operation == Operation.RLA: cycles = self._do_rla(opcode)
-        elif opcode.operation == Operation.RLCA: cycles = self._do_rlca(opcode)
-        elif opcode.operation == Operation.RRA: cycles = self._do_rra(opcode)
-        elif opcode.operation == Operation.RRCA: cycles = self._do_rrca(opcode)
-        elif opcode.operation == Operation.RST: cycles = self._do_restart(opcode)
-        elif opcode.operation == Operation.SBC: cycles = self._do_sub_8_bit(opcode, with_carry=True)
-        elif opcode.operation == Operation.SCF: cycles = self._do_set_carry_flag(opcode)
-        elif opcode.operation == Operation.STOP: cycles = opcode.cycles  # TODO implement STOP
-        elif opcode.operation == Operation.SUB: cycles = self._do_sub_8_bit(opcode)
-        elif opcode.operation == Operation.XOR: cycles = self._do_xor(opcode)
-        else: raise Exception(f"Unknown operation encountered 0x{format(op, '02x')} - {opcode.mnemonic}")
-
-        # Deal with interrupt enabling/disabling
-        self._toggle_interrupts_enabled()
-        self.last_opcode = opcode
+        cycles = self.handlers[op](opcode)
+
+        # Deal with interrupt enabling
+        if self.enable_interrupts_countdown:
+            self._toggle_interrupts_enabled()
 
         # Sync remaining cycles for the instruction
         self._sync_cycles(cycles - self.cycle_tracker)
 
         return cycles
 
+    def _skip_halted_cycles(self, max_cycles: int) -> int:
+        '''
+        While halted, the CPU does nothing until an interrupt is requested, which can only happen
+        when one of the components has an event due. Rather than idling 4 cycles at a time, skip
+        straight to the next event, or to max_cycles if that comes first
+
+        :return the number of cycles spent halted
+        '''
+
+        cycles = min(self.scheduler.cycles_until_next_event(), max_cycles)
+
+        # The CPU still idles in steps of 4 cycles
+        cycles = max(4, (cycles + 3) & ~3)
+        self.scheduler.add_cycles(cycles)
+
+        return cycles
+
+    def _build_handlers(self) -> "list[Callable[[OpCode], int]]":
+        '''
+        Build the dispatch table for the CPU. Each entry is the handler for the operation
+        of the opcode at that index, so the operation never needs to be compared at runtime
+
+        :return a list of 256 handlers, indexed by opcode
+        '''
+
+        operation_handlers = {
+            Operation.ADC: self._do_add_8_bit_with_carry,
+            Operation.ADD: self._do_add_8_bit,
+            Operation.ADD_16_BIT: self._do_add_16_bit,
+            Operation.AND: self._do_and,
+            Operation.CALL: self._do_call,
+            Operation.CCF: self._do_complement_carry,
+            Operation.CP: self._do_compare,
+            Operation.CPL: self._do_complement,
+            Operation.DAA: self._do_daa,
+            Operation.DEC: self._do_decrement_8_bit,
+            Operation.DEC_16_BIT: self._do_decrement_16_bit,
+            Operation.DI: self._do_disable_interrupts,
+            Operation.EI: self._do_enable_interrupts,
+            Operation.HALT: self._do_halt,
+            Operation.INC: self._do_increment_8_bit,
+            Operation.INC_16_BIT: self._do_increment_16_bit,
+            Operation.JP: self._do_jump,
+            Operation.JR: self._do_jump_relative,
+            Operation.LD: self._do_load,
+            # LDH only has the two forms, both always get a specialized handler below
+            Operation.LDH: self._do_load,
+            Operation.NOP: self._do_nop,
+            Operation.OR: self._do_or,
+            Operation.POP: self._do_pop,
+            Operation.PREFIX: self._do_prefix,
+            Operation.PUSH: self._do_push,
+            Operation.RET: self._do_return,
+            Operation.RETI: self._do_return,
+            Operation.RLA: self._do_rotate_a,
+            Operation.RLCA: self._do_rotate_a,
+            Operation.RRA: self._do_rotate_a,
+            Operation.RRCA: self._do_rotate_a,
+            Operation.RST: self._do_restart,
+            Operation.SBC: self._do_sub_8_bit_with_carry,
+            Operation.SCF: self._do_set_carry_flag,
+            Operation.STOP: self._do_nop,  # TODO implement STOP
+            Operation.SUB: self._do_sub_8_bit,
+            Operation.XOR: self._do_xor,
+            Operation.ILLEGAL: self._do_unknown,
+        }
+
+        handlers = [operation_handlers[opcode.operation] for opcode in opcodes_map]
+
+        # The most common loads, register arithmetic and conditional jumps get a handler specialized
+        # for their operands, so they don't need to decode them from the opcode
+        for opcode in opcodes_map:
+            code = opcode.code
+            operation = opcode.operation
+
+            if operation == Operation.LD:
+                if 0x40 <= code < 0x80 and code & 0x7 != 6 and (code >> 3) & 0x7 != 6:
+                    handlers[code] = self._make_load_register((code >> 3) & 0x7, code & 0x7, opcode.cycles)
+                elif 0x40 <= code < 0x80 and code & 0x7 == 6:
+                    handlers[code] = self._make_load_from_hl((code >> 3) & 0x7, opcode.cycles)
+                elif 0x70 <= code < 0x78:
+                    handlers[code] = self._make_load_to_hl(code & 0x7, opcode.cycles)
+                elif code < 0x40 and code & 0x7 == 6 and code != 0x36:
+                    handlers[code] = self._make_load_immediate((code >> 3) & 0x7, opcode.cycles)
+                elif code in (0x01, 0x11, 0x21):
+                    high = (code >> 4) * 2
+                    handlers[code] = self._make_load_immediate_word(high, high + 1, opcode.cycles)
+                elif code < 0x40 and code & 0x7 == 2:
+                    # LD (BC), A through LD A, (HL-) - BC and DE for 0x0X and 0x1X, then HL+ and HL-
+                    high = min(code >> 4, 2) * 2
+                    step = (0, 0, 1, -1)[code >> 4]
+                    if code & 0x8:
+                        handlers[code] = self._make_load_from_pair(high, high + 1, step, opcode.cycles)
+                    else:
+                        handlers[code] = self._make_load_to_pair(high, high + 1, step, opcode.cycles)
+
+            elif code in (0x03, 0x13, 0x23, 0x0B, 0x1B, 0x2B):
+                # INC and DEC of BC, DE and HL - bit 3 of the opcode picks DEC
+                high = (code >> 4) * 2
+                handlers[code] = self._make_step_pair(high, high + 1, -1 if code & 0x8 else 1, opcode.cycles)
+
+            elif operation == Operation.LDH:
+                handlers[code] = self._make_load_high(code == 0xF0, opcode.cycles)
+
+            elif code == 0x97 or code == 0xAF:
+                # SUB A and XOR A are the usual way to zero A, the flags they leave are always the same
+                flags = FLAG_ZERO | FLAG_SUBTRACTION if code == 0x97 else FLAG_ZERO
+                handlers[code] = self._make_clear_a(flags, opcode.cycles)
+
+            elif 0x80 <= code < 0xC0 and code & 0x7 != 6:
+                if operation == Operation.ADD or operation == Operation.ADC:
+                    handlers[code] = self._make_arithmetic_register(
+                        ADD_TABLE, operation == Operation.ADC, code & 0x7, opcode.cycles
+                    )
+                elif operation == Operation.SUB or operation == Operation.SBC:
+                    handlers[code] = self._make_arithmetic_register(
+                        SUB_TABLE, operation == Operation.SBC, code & 0x7, opcode.cycles
+                    )
+                elif operation == Operation.CP:
+                    handlers[code] = self._make_compare_register(code & 0x7, opcode.cycles)
+                else:
+                    handlers[code] = self._make_logic_register(operation, code & 0x7, opcode.cycles)
+
+            elif operation == Operation.INC and (code >> 3) & 0x7 != 6:
+                handlers[code] = self._make_increment_register((code >> 3) & 0x7, opcode.cycles)
+
+            elif operation == Operation.DEC and (code >> 3) & 0x7 != 6:
+                handlers[code] = self._make_decrement_register((code >> 3) & 0x7, opcode.cycles)
+
+            elif code == 0xFE:
+                handlers[code] = self._make_compare_immediate(opcode.cycles)
+
+            elif code in (0x20, 0x28, 0x30, 0x38):
+                handlers[code] = self._make_jump_relative_conditional(code, opcode.cycles, opcode.alt_cycles)
+
+            elif code in (0xC2, 0xCA, 0xD2, 0xDA):
+                handlers[code] = self._make_jump_conditional(code, opcode.cycles, opcode.alt_cycles)
+
+        return handlers
+
+    def _build_prefix_handlers(self) -> "list[Callable[[OpCode], int]]":
+        '''
+        Build the dispatch table for the CB prefixed instructions, the same way as _build_handlers
+
+        :return a list of 256 handlers, indexed by the opcode following the prefix
+        '''
+
+        operation_handlers = {
+            Operation.BIT: self._do_bit,
+            Operation.RES: self._do_res,
+            Operation.RL: self._do_rotate,
+            Operation.RLC: self._do_rotate,
+            Operation.RR: self._do_rotate,
+            Operation.RRC: self._do_rotate,
+            Operation.SET: self._do_set,
+            Operation.SLA: self._do_rotate,
+            Operation.SRA: self._do_rotate,
+            Operation.SRL: self._do_rotate,
+            Operation.SWAP: self._do_rotate,
+            Operation.ILLEGAL: self._do_unknown,
+        }
+
+        handlers = [operation_handlers[opcode.operation] for opcode in prefix_opcodes_map]
+
+        # Rotates and shifts, BIT, RES and SET on a register, and SET on (HL), get a handler with
+        # their table or bit and their register bound, so they don't need to decode the opcode
+        for opcode in prefix_opcodes_map:
+            code = opcode.code
+            if opcode.operation in ROTATE_TABLES:
+                handlers[code] = self._make_rotate(ROTATE_TABLES[opcode.operation], code & 0x7, opcode.cycles)
+                continue
+
+            if code < 0x40:
+                continue
+
+            bit = (code >> 3) & 0x7
+            if opcode.operation == Operation.SET and code & 0x7 == 6:
+                handlers[code] = self._make_set_hl(bit, opcode.cycles)
+            elif code & 0x7 == 6:
+                continue
+            elif opcode.operation == Operation.BIT:
+                handlers[code] = self._make_bit_register(bit, code & 0x7, opcode.cycles)
+            elif opcode.operation == Operation.RES:
+                handlers[code] = self._make_res_register(bit, code & 0x7, opcode.cycles)
+            elif opcode.operation == Operation.SET:
+                handlers[code] = self._make_set_register(bit, code & 0x7, opcode.cycles)
+
+        return handlers
+
+    def _make_rotate(self, table: "tuple[int, ...]", target: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler for a CB rotate or shift (i.e. RL C or SRL (HL)), looking up the result
+        and flags in one of the ROTATE_TABLES
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        if target != 6:
+            def rotate_register(opcode: OpCode) -> int:
+                res = table[((registers[REG_F] & FLAG_CARRY) << 4) | registers[target]]
+                registers[target] = res & 0xFF
+                registers[REG_F] = res >> 8
+                return cycles
+
+            return rotate_register
+
+        read_memory = self._read_memory
+        write_memory = self._write_memory
+        sync_cycles = self._sync_cycles
+
+        def rotate_hl(opcode: OpCode) -> int:
+            addr = (registers[REG_H] << 8) | registers[REG_L]
+
+            # Reading and writing (HL) each take a memory cycle
+            sync_cycles(4)
+            res = table[((registers[REG_F] & FLAG_CARRY) << 4) | read_memory(addr)]
+            registers[REG_F] = res >> 8
+            sync_cycles(4)
+            write_memory(addr, res & 0xFF)
+            return cycles
+
+        return rotate_hl
+
+    def _make_bit_register(self, bit: int, source: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that tests a bit of a register (i.e. BIT 7, H)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        mask = 1 << bit
+
+        def bit_register(opcode: OpCode) -> int:
+            # Zero is set if the bit is clear, half carry is set, subtraction is cleared and carry is kept
+            flags = (registers[REG_F] & FLAG_CARRY) | FLAG_HALF_CARRY
+            if not registers[source] & mask:
+                flags |= FLAG_ZERO
+
+            registers[REG_F] = flags
+            return cycles
+
+        return bit_register
+
+    def _make_res_register(self, bit: int, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that resets a bit of a register (i.e. RES 0, A)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        mask = 0xFF ^ (1 << bit)
+
+        def res_register(opcode: OpCode) -> int:
+            registers[dest] &= mask
+            return cycles
+
+        return res_register
+
+    def _make_set_register(self, bit: int, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that sets a bit of a register (i.e. SET 0, A)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        mask = 1 << bit
+
+        def set_register(opcode: OpCode) -> int:
+            registers[dest] |= mask
+            return cycles
+
+        return set_register
+
+    def _make_set_hl(self, bit: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that sets a bit of the byte at the address in HL (i.e. SET 0, (HL))
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        read_memory = self._read_memory
+        write_memory = self._write_memory
+        sync_cycles = self._sync_cycles
+        mask = 1 << bit
+
+        def set_hl(opcode: OpCode) -> int:
+            addr = (registers[REG_H] << 8) | registers[REG_L]
+
+            # Reading and writing (HL) each take a memory cycle
+            sync_cycles(4)
+            val = read_memory(addr)
+            sync_cycles(4)
+            write_memory(addr, val | mask)
+            return cycles
+
+        return set_hl
+
+    def _make_arithmetic_register(
+        self, table: "tuple[int, ...]", with_carry: bool, source: int, cycles: int
+    ) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that adds or subtracts a register from A (i.e. ADD A, B or SBC A, C)
+        using one of the precomputed ALU tables
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        if with_carry:
+            def arithmetic_with_carry(opcode: OpCode) -> int:
+                # The carry flag (bit 4 of F) shifted up to bit 16 selects the with carry half of the table
+                packed = table[((registers[REG_F] & FLAG_CARRY) << 12) | (registers[REG_A] << 8) | registers[source]]
+                registers[REG_A] = packed & 0xFF
+                registers[REG_F] = packed >> 8
+                return cycles
+
+            return arithmetic_with_carry
+
+        def arithmetic(opcode: OpCode) -> int:
+            packed = table[(registers[REG_A] << 8) | registers[source]]
+            registers[REG_A] = packed & 0xFF
+            registers[REG_F] = packed >> 8
+            return cycles
+
+        return arithmetic
+
+    def _make_logic_register(self, operation: int, source: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler for AND, OR or XOR of A with a register (i.e. XOR C)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        if operation == Operation.AND:
+            def and_register(opcode: OpCode) -> int:
+                val = registers[REG_A] & registers[source]
+                registers[REG_A] = val
+                registers[REG_F] = FLAG_HALF_CARRY | (FLAG_ZERO if val == 0 else 0)
+                return cycles
+
+            return and_register
+
+        if operation == Operation.OR:
+            def or_register(opcode: OpCode) -> int:
+                val = registers[REG_A] | registers[source]
+                registers[REG_A] = val
+                registers[REG_F] = FLAG_ZERO if val == 0 else 0
+                return cycles
+
+            return or_register
+
+        def xor_register(opcode: OpCode) -> int:
+            val = registers[REG_A] ^ registers[source]
+            registers[REG_A] = val
+            registers[REG_F] = FLAG_ZERO if val == 0 else 0
+            return cycles
+
+        return xor_register
+
+    def _make_clear_a(self, flags: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler for an operation of A with itself that always clears it (i.e. XOR A)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def clear_a(opcode: OpCode) -> int:
+            registers[REG_A] = 0
+            registers[REG_F] = flags
+            return cycles
+
+        return clear_a
+
+    def _make_compare_register(self, source: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that compares a register with A (i.e. CP B)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def compare(opcode: OpCode) -> int:
+            registers[REG_F] = SUB_TABLE[(registers[REG_A] << 8) | registers[source]] >> 8
+            return cycles
+
+        return compare
+
+    def _make_compare_immediate(self, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that compares the next byte with A (CP d8)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        get_next_byte = self._get_next_byte
+
+        def compare_immediate(opcode: OpCode) -> int:
+            registers[REG_F] = SUB_TABLE[(registers[REG_A] << 8) | get_next_byte()] >> 8
+            return cycles
+
+        return compare_immediate
+
+    def _make_load_register(self, dest: int, source: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads one register into another (i.e. LD B, C)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def load_register(opcode: OpCode) -> int:
+            registers[dest] = registers[source]
+            return cycles
+
+        return load_register
+
+    def _make_increment_register(self, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that increments a register (i.e. INC B)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def increment_register(opcode: OpCode) -> int:
+            val = (registers[dest] + 1) & 0xFF
+            registers[dest] = val
+            registers[REG_F] = (registers[REG_F] & FLAG_CARRY) | INC_FLAGS[val]
+            return cycles
+
+        return increment_register
+
+    def _make_decrement_register(self, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that decrements a register (i.e. DEC B)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def decrement_register(opcode: OpCode) -> int:
+            val = (registers[dest] - 1) & 0xFF
+            registers[dest] = val
+            registers[REG_F] = (registers[REG_F] & FLAG_CARRY) | DEC_FLAGS[val]
+            return cycles
+
+        return decrement_register
+
+    def _make_jump_conditional(self, code: int, cycles: int, alt_cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler for a conditional absolute jump (i.e. JP NZ, a16), with the flag and
+        the value it needs to have for the jump to be taken worked out from the opcode up front
+
+        :return the specialized handler
+        '''
+
+        condition = (code >> 3) & 0x3
+        flag = CONDITION_FLAGS[condition]
+        expected = flag if condition & 1 else 0
+
+        registers = self.registers
+        get_next_word = self._get_next_word
+
+        def jump_conditional(opcode: OpCode) -> int:
+            addr = get_next_word()
+            if (registers[REG_F] & flag) != expected:
+                return alt_cycles
+
+            self.program_counter = addr
+            return cycles
+
+        return jump_conditional
+
+    def _make_step_pair(self, high: int, low: int, step: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that increments or decrements a register pair by the given step
+        (i.e. INC HL or DEC BC)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+
+        def step_pair(opcode: OpCode) -> int:
+            val = (((registers[high] << 8) | registers[low]) + step) & 0xFFFF
+            registers[high] = val >> 8
+            registers[low] = val & 0xFF
+            return cycles
+
+        return step_pair
+
+    def _make_jump_relative_conditional(
+        self, code: int, cycles: int, alt_cycles: int
+    ) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler for a conditional relative jump (i.e. JR NZ, r8), with the flag and
+        the value it needs to have for the jump to be taken worked out from the opcode up front
+
+        :return the specialized handler
+        '''
+
+        condition = (code >> 3) & 0x3
+        flag = CONDITION_FLAGS[condition]
+        expected = flag if condition & 1 else 0
+
+        registers = self.registers
+        get_next_byte = self._get_next_byte
+
+        def jump_relative_conditional(opcode: OpCode) -> int:
+            offset = get_next_byte()
+            if (registers[REG_F] & flag) != expected:
+                return alt_cycles
+
+            # The offset is signed, so bytes above 0x7F jump backwards
+            self.program_counter = (self.program_counter + SIGNED_BYTES[offset]) & 0xFFFF
+            return cycles
+
+        return jump_relative_conditional
+
+    def _make_load_immediate(self, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads the next byte into a register (i.e. LD B, d8)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        get_next_byte = self._get_next_byte
+
+        def load_immediate(opcode: OpCode) -> int:
+            registers[dest] = get_next_byte()
+            return cycles
+
+        return load_immediate
+
+    def _make_load_high(self, to_a: bool, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads A from, or stores A to, 0xFF00 plus the next byte - the I/O
+        registers and high RAM (LDH A, (a8) or LDH (a8), A)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        get_next_byte = self._get_next_byte
+        read_memory = self._read_memory
+        write_memory = self._write_memory
+        sync_cycles = self._sync_cycles
+
+        if to_a:
+            def load_high_to_a(opcode: OpCode) -> int:
+                addr = 0xFF00 | get_next_byte()
+                sync_cycles(4)
+                registers[REG_A] = read_memory(addr)
+                return cycles
+
+            return load_high_to_a
+
+        def load_high_from_a(opcode: OpCode) -> int:
+            sync_cycles(4)
+            write_memory(0xFF00 | get_next_byte(), registers[REG_A])
+            return cycles
+
+        return load_high_from_a
+
+    def _make_load_from_hl(self, dest: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads the byte at the address in HL into a register (i.e. LD B, (HL))
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        read_memory = self._read_memory
+
+        def load_from_hl(opcode: OpCode) -> int:
+            registers[dest] = read_memory((registers[REG_H] << 8) | registers[REG_L])
+            return cycles
+
+        return load_from_hl
+
+    def _make_load_to_hl(self, source: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that stores a register at the address in HL (i.e. LD (HL), B)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        write_memory = self._write_memory
+
+        def load_to_hl(opcode: OpCode) -> int:
+            write_memory((registers[REG_H] << 8) | registers[REG_L], registers[source])
+            return cycles
+
+        return load_to_hl
+
+    def _make_load_from_pair(self, high: int, low: int, step: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads A from the address in a register pair, then steps the pair
+        by the given amount (i.e. LD A, (BC) or LD A, (HL+))
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        read_memory = self._read_memory
+
+        def load_from_pair(opcode: OpCode) -> int:
+            addr = (registers[high] << 8) | registers[low]
+            registers[REG_A] = read_memory(addr)
+            if step:
+                addr = (addr + step) & 0xFFFF
+                registers[high] = addr >> 8
+                registers[low] = addr & 0xFF
+            return cycles
+
+        return load_from_pair
+
+    def _make_load_to_pair(self, high: int, low: int, step: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that stores A at the address in a register pair, then steps the pair
+        by the given amount (i.e. LD (BC), A or LD (HL+), A)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        write_memory = self._write_memory
+
+        def load_to_pair(opcode: OpCode) -> int:
+            addr = (registers[high] << 8) | registers[low]
+            write_memory(addr, registers[REG_A])
+            if step:
+                addr = (addr + step) & 0xFFFF
+                registers[high] = addr >> 8
+                registers[low] = addr & 0xFF
+            return cycles
+
+        return load_to_pair
+
+    def _make_load_immediate_word(self, high: int, low: int, cycles: int) -> "Callable[[OpCode], int]":
+        '''
+        Create a handler that loads the next word into a register pair (i.e. LD BC, d16)
+
+        :return the specialized handler
+        '''
+
+        registers = self.registers
+        get_next_word = self._get_next_word
+
+        def load_immediate_word(opcode: OpCode) -> int:
+            word = get_next_word()
+            registers[high] = word >> 8
+            registers[low] = word & 0xFF
+            return cycles
+
+        return load_immediate_word
+
     def is_interrupts_enabled(self) -> bool:
         '''
         Return whether or not the master interrupt switch is enabled
@@ -256,28 +1101,14 @@ class Cpu:
 
             # Turn off the request for the requested interrupt
             interrupts_requested = self._read_memory(INTERRUPT_FLAG_ADDR)
-            interrupts_requested = reset_bit(interrupts_requested, interrupt.value)
+            interrupts_requested &= ~(1 << interrupt.value) & 0xFF
             self._write_memory(INTERRUPT_FLAG_ADDR, interrupts_requested)
 
             # Push current PC to the stack
             self._push_word_to_stack(self.program_counter)
 
-            # Service the Interrupt based on value
-            # VBlank Interrupt - INT $40
-            # LCD Stat Interrupt - INT $48
-            # Timer Interrupt - INT $50
-            # Serial Interrupt - INT $58
-            # Joypad Interrupt - INT $60
-            if interrupt == Interrupt.V_BLANK:
-                self.program_counter = 0x40
-            elif interrupt == Interrupt.LCD_STAT:
-                self.program_counter = 0x48
-            elif interrupt == Interrupt.TIMER:
-                self.program_counter = 0x50
-            elif interrupt == Interrupt.SERIAL:
-                self.program_counter = 0x58
-            elif interrupt == Interrupt.JOYPAD:
-                self.program_counter = 0x60
+            # Service the Interrupt by jumping to its vector
+            self.program_counter = INTERRUPT_VECTORS[interrupt]
 
             return 20
 
@@ -287,11 +1118,11 @@ class Cpu:
         '''
         Instructions increment other components clock during execution
         not all at once - this is used to be able to sync components
-        during execution
+        during execution. The scheduler holds onto the cycles until a component
+        actually has something to do
         '''
 
-        self.timer.update_timers(cycles)
-        self.ppu.update_graphics(cycles)
+        self.scheduler.add_cycles(cycles)
 
         self.cycle_tracker += cycles
 
@@ -302,153 +1133,145 @@ class Cpu:
         :return the data from memory
         '''
 
-        return self.memory.read_byte(addr)
+        # I/O registers may be changed by the other components, so catch them up first
+        if 0xFF00 <= addr < 0xFF80 and self.scheduler.pending_cycles:
+            self.scheduler.sync()
+
+        return self.read_byte(addr)
 
     def _write_memory(self, addr: int, data: int):
         '''
         Write a byte to memory
         '''
 
-        # Testing for Blargg output
-        if addr == 0xFF01:
-            # print(str(self.debug_ctr) + " - " + format(addr, '0x'), format(data, '0x'))
-            if self._read_memory(0xFF02) == 0x81:
-                print(chr(data), end="")
-                # if chr(data) == '\n':
-                #     # print(self.debug_set)
-                #     for item in self.debug_set:
-                #         print(item)
-                # self.debug_ctr += 1
+        is_io_register = 0xFF00 <= addr < 0xFF80
+        if is_io_register and self.scheduler.pending_cycles:
+            self.scheduler.sync()
 
-        self.memory.write_byte(addr, data)
+        self.write_byte(addr, data)
 
-    def _get_next_byte(self) -> int:
-        '''
-        Gets the next byte at the location of the program counter, and increments the program counter
+        # Writing an I/O register can change when the next component event is due
+        if is_io_register:
+            self.scheduler.invalidate()
 
-        :return an int representing the next byte in memory
+    def _fetch_byte(self, addr: int) -> int:
         '''
+        Read a byte of an instruction from memory. Fixed ROM, work RAM, and high RAM are never
+        remapped by the MMU so we can index them directly, and the switchable ROM bank is read
+        straight from the ROM data. Everything else goes through _read_memory
 
-        byte = self._read_memory(self.program_counter)
-        self.program_counter = (self.program_counter + 1) & 0xFFFF
-        return byte & 0xFF
-
-    def _get_next_byte_signed(self) -> int:
+        :return the data from memory
         '''
-        Gets the next byte at the location of the program counter, as an 8-bit signed,
-        and increments the program counter
 
-        :return an int representing the next signed byte in memory
-        '''
+        if addr < 0x4000 or 0xC000 <= addr < 0xFE00 or addr >= 0xFF80:
+            return self.raw_memory[addr]
 
-        byte = self._get_next_byte()
-        return byte - 256 if byte > 127 else byte
+        if addr < 0x8000:
+            memory = self.memory
+            return memory.rom_data[addr + memory.rom_bank_offset]
 
-    def _get_next_word(self) -> int:
-        '''
-        Gets the next 2 bytes at the location of the program counter. CPU is little endian
+        return self._read_memory(addr)
 
-        :return an int representing the next two bytes in memory, properly made for little endian
+    def _get_next_byte(self) -> int:
         '''
+        Gets the next byte at the location of the program counter, and increments the program counter
 
-        first_byte = self._get_next_byte()
-        second_byte = self._get_next_byte()
-        return ((second_byte << 8) | first_byte) & 0xFFFF
-
-    def _is_zero_flag_set(self) -> bool:
+        :return an int representing the next byte in memory
         '''
-        Checks if zero flag in F register is set
 
-        :return True if zero flag is set, False otherwise
-        '''
+        addr = self.program_counter
+        self.program_counter = (addr + 1) & 0xFFFF
 
-        return get_bit_val(self.af.lo, Flags.ZERO.value)
+        # Every immediate operand is read through here, so the most common case of _fetch_byte
+        # is done inline to save a call
+        if addr < 0x4000 or 0xC000 <= addr < 0xFE00 or addr >= 0xFF80:
+            return self.raw_memory[addr]
 
-    def _is_carry_flag_set(self) -> bool:
-        '''
-        Checks if carry flag in F register is set
+        return self._fetch_byte(addr) & 0xFF
 
-        :return True if carry flag is set, False otherwise
+    def _read_operand(self, code: int) -> int:
         '''
+        Reads the source operand of an 8-bit arithmetic/logic instruction. The low 3 bits of
+        the opcode select the register in the order B, C, D, E, H, L, (HL), A - the same order
+        the registers are stored in - and the opcodes from 0xC0 up take the next byte instead
 
-        return get_bit_val(self.af.lo, Flags.CARRY.value)
-
-    def _is_half_carry_flag_set(self) -> bool:
+        :return the value of the operand
         '''
-        Checks if half carry flag in F register is set
 
-        :return True if half carry flag is set, False otherwise
-        '''
+        if code >= 0xC0:
+            return self._get_next_byte()
 
-        return get_bit_val(self.af.lo, Flags.HALF_CARRY.value)
+        registers = self.registers
+        source = code & 0x7
+        if source == 6:
+            return self._read_memory((registers[REG_H] << 8) | registers[REG_L])
 
-    def _is_sub_flag_set(self) -> bool:
-        '''
-        Checks if subtract flag in F register is set
+        return registers[source]
 
-        :return True if subtract flag is set, False otherwise
+    def _read_prefix_operand(self, code: int) -> int:
         '''
+        Reads the operand of a CB prefixed instruction, selected by the low 3 bits of the opcode
+        in the same order as _read_operand. Reading (HL) takes an extra memory cycle
 
-        return get_bit_val(self.af.lo, Flags.SUBTRACTION.value)
-
-    def _update_zero_flag(self, val: bool):
-        '''
-        Set zero flag if val is True, otherwise reset it
+        :return the value of the operand
         '''
 
-        if val:
-            self.af.lo = set_bit(self.af.lo, Flags.ZERO.value)
-        else:
-            self.af.lo = reset_bit(self.af.lo, Flags.ZERO.value)
-
-    def _update_sub_flag(self, val: bool):
-        '''
-        Set sub flag if val is True, otherwise reset it
-        '''
+        registers = self.registers
+        source = code & 0x7
+        if source == 6:
+            self._sync_cycles(4)
+            return self._read_memory((registers[REG_H] << 8) | registers[REG_L])
 
-        if val:
-            self.af.lo = set_bit(self.af.lo, Flags.SUBTRACTION.value)
-        else:
-            self.af.lo = reset_bit(self.af.lo, Flags.SUBTRACTION.value)
+        return registers[source]
 
-    def _update_half_carry_flag(self, val: bool):
+    def _write_prefix_operand(self, code: int, val: int):
         '''
-        Set half carry flag if val is True, otherwise reset it
+        Writes the result of a CB prefixed instruction back to the operand it was read from
         '''
 
-        if val:
-            self.af.lo = set_bit(self.af.lo, Flags.HALF_CARRY.value)
+        registers = self.registers
+        dest = code & 0x7
+        if dest == 6:
+            self._sync_cycles(4)
+            self._write_memory((registers[REG_H] << 8) | registers[REG_L], val)
         else:
-            self.af.lo = reset_bit(self.af.lo, Flags.HALF_CARRY.value)
+            registers[dest] = val
 
-    def _update_carry_flag(self, val: bool):
+    def _get_next_word(self) -> int:
         '''
-        Set carry flag if val is True, otherwise reset it
+        Gets the next 2 bytes at the location of the program counter. CPU is little endian
+
+        :return an int representing the next two bytes in memory, properly made for little endian
         '''
 
-        if val:
-            self.af.lo = set_bit(self.af.lo, Flags.CARRY.value)
-        else:
-            self.af.lo = reset_bit(self.af.lo, Flags.CARRY.value)
+        addr = self.program_counter
 
-    def _push_byte_to_stack(self, byte: int):
-        '''
-        Push a byte value onto the stack and decrement the stack pointer
-        '''
+        # If both bytes are in memory that can be fetched directly, read them in one go
+        if addr < 0x3FFF or 0xC000 <= addr < 0xFDFF or 0xFF80 <= addr < 0xFFFF:
+            self.program_counter = (addr + 2) & 0xFFFF
+            return unpack_word(self.raw_memory, addr)[0]
+
+        if 0x4000 <= addr < 0x7FFF:
+            memory = self.memory
+            self.program_counter = addr + 2
+            return unpack_word(memory.rom_data, addr + memory.rom_bank_offset)[0]
 
-        self.stack_pointer -= 1
-        self._write_memory(self.stack_pointer, byte)
+        first_byte = self._get_next_byte()
+        second_byte = self._get_next_byte()
+        return ((second_byte << 8) | first_byte) & 0xFFFF
 
-    def _pop_byte_from_stack(self) -> int:
+    def _is_condition_met(self, code: int) -> bool:
         '''
-        Pop a byte from the stack and increment the stack pointer
+        Conditional jumps, calls, and returns encode their condition in bits 3 and 4 of the
+        opcode - 0 = NZ, 1 = Z, 2 = NC, 3 = C. The condition is met when the flag it tests
+        matches the low bit of the condition
 
-        :return the popped value
+        :return True if the condition for the opcode is met, False otherwise
         '''
 
-        val = self._read_memory(self.stack_pointer)
-        self.stack_pointer += 1
-        return val
+        condition = (code >> 3) & 0x3
+        is_flag_set = (self.registers[REG_F] & CONDITION_FLAGS[condition]) != 0
+        return is_flag_set == (condition & 1)
 
     def _push_word_to_stack(self, word: int):
         '''
@@ -456,10 +1279,20 @@ class Cpu:
         Push in order of endianess so lo is popped first (hi pushed first, lo second)
         '''
 
-        lo = word & 0xFF
-        hi = word >> 8
-        self._push_byte_to_stack(hi)
-        self._push_byte_to_stack(lo)
+        # The stack almost always lives in work RAM or high RAM, which writes don't need
+        # the MMU for, so write both bytes directly
+        addr = self.stack_pointer - 2
+        if 0xC000 <= addr < 0xDFFF or 0xFF80 <= addr < 0xFFFF:
+            self.stack_pointer = addr
+            self.raw_memory[addr] = word & 0xFF
+            self.raw_memory[addr + 1] = word >> 8
+            return
+
+        # Otherwise go through the MMU, still writing hi first
+        addr &= 0xFFFF
+        self.stack_pointer = addr
+        self._write_memory((addr + 1) & 0xFFFF, word >> 8)
+        self._write_memory(addr, word & 0xFF)
 
     def _pop_word_from_stack(self) -> int:
         '''
@@ -468,24 +1301,23 @@ class Cpu:
         :return the popped value
         '''
 
-        lo = self._pop_byte_from_stack()
-        hi = self._pop_byte_from_stack()
-        return ((hi << 8) | lo) & 0xFFFF
+        addr = self.stack_pointer
+        if 0xC000 <= addr < 0xFDFF or 0xFF80 <= addr < 0xFFFF:
+            self.stack_pointer = (addr + 2) & 0xFFFF
+            return unpack_word(self.raw_memory, addr)[0]
+
+        self.stack_pointer = (addr + 2) & 0xFFFF
+        lo = self._read_memory(addr)
+        hi = self._read_memory((addr + 1) & 0xFFFF)
+        return (hi << 8) | lo
 
     def _toggle_interrupts_enabled(self):
         '''
-        Enable or disable interrupts if that was previously requested as part of a DI or EI instruction
+        Count down to enabling interrupts, if that was previously requested by an EI instruction
         '''
 
-        if self.last_opcode is None:
-            return
-
-        if self.last_opcode.operation == Operation.DI and self.will_disable_interrupts:
-            self.will_disable_interrupts = False
-            self.interrupts_enabled = False
-
-        elif self.last_opcode.operation == Operation.EI and self.will_enable_interrupts:
-            self.will_enable_interrupts = False
+        self.enable_interrupts_countdown -= 1
+        if self.enable_interrupts_countdown == 0:
             self.interrupts_enabled = True
 
     def _do_add_8_bit(self, opcode: OpCode, with_carry=False) -> int:
@@ -495,40 +1327,26 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_add(val_1: int, val_2: int) -> int:
-            carry = 1 if with_carry and self._is_carry_flag_set() else 0
-            res = val_1 + val_2 + carry
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_sub_flag(False)
-            self._update_carry_flag(res > 0xFF)
-            self._update_half_carry_flag((val_1 & 0xF) + (val_2 & 0xF) + carry > 0xF)
-
-            return res & 0xFF
-
-        # # match opcode.code:
-        if opcode.code == 0x80: self.af.hi = do_add(self.af.hi, self.bc.hi)
-        elif opcode.code == 0x81: self.af.hi = do_add(self.af.hi, self.bc.lo)
-        elif opcode.code == 0x82: self.af.hi = do_add(self.af.hi, self.de.hi)
-        elif opcode.code == 0x83: self.af.hi = do_add(self.af.hi, self.de.lo)
-        elif opcode.code == 0x84: self.af.hi = do_add(self.af.hi, self.hl.hi)
-        elif opcode.code == 0x85: self.af.hi = do_add(self.af.hi, self.hl.lo)
-        elif opcode.code == 0x86: self.af.hi = do_add(self.af.hi, self._read_memory(self.hl.value))
-        elif opcode.code == 0x87: self.af.hi = do_add(self.af.hi, self.af.hi)
-        elif opcode.code == 0x88: self.af.hi = do_add(self.af.hi, self.bc.hi)
-        elif opcode.code == 0x89: self.af.hi = do_add(self.af.hi, self.bc.lo)
-        elif opcode.code == 0x8A: self.af.hi = do_add(self.af.hi, self.de.hi)
-        elif opcode.code == 0x8B: self.af.hi = do_add(self.af.hi, self.de.lo)
-        elif opcode.code == 0x8C: self.af.hi = do_add(self.af.hi, self.hl.hi)
-        elif opcode.code == 0x8D: self.af.hi = do_add(self.af.hi, self.hl.lo)
-        elif opcode.code == 0x8E: self.af.hi = do_add(self.af.hi, self._read_memory(self.hl.value))
-        elif opcode.code == 0x8F: self.af.hi = do_add(self.af.hi, self.af.hi)
-        elif opcode.code == 0xC6: self.af.hi = do_add(self.af.hi, self._get_next_byte())
-        elif opcode.code == 0xCE: self.af.hi = do_add(self.af.hi, self._get_next_byte())
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        registers = self.registers
+        val = self._read_operand(opcode.code)
+        # The carry flag (bit 4 of F) shifted up to bit 16 selects the with carry half of the table
+        carry = (registers[REG_F] & FLAG_CARRY) << 12 if with_carry else 0
+
+        packed = ADD_TABLE[carry | (registers[REG_A] << 8) | val]
+        registers[REG_A] = packed & 0xFF
+        registers[REG_F] = packed >> 8
 
         return opcode.cycles
 
+    def _do_add_8_bit_with_carry(self, opcode: OpCode) -> int:
+        '''
+        Performs an 8-bit add operation including the carry flag (ADC)
+
+        :return the number of cycles needed to execute this operation
+        '''
+
+        return self._do_add_8_bit(opcode, with_carry=True)
+
     def _do_add_16_bit(self, opcode: OpCode) -> int:
         '''
         Performs an 16-bit add operation
@@ -536,30 +1354,37 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_add(val_1: int, val_2: int) -> int:
-            res = val_1 + val_2
+        registers = self.registers
 
-            self._update_sub_flag(False)
-            self._update_carry_flag(res > 0xFFFF)
-            self._update_half_carry_flag((val_1 & 0xFFF) + (val_2 & 0xFFF) & 0x1000)
+        if opcode.code == 0xE8:
+            # 16 bit arithmetic but it doesn't follow the same flag conventions
+            offset = SIGNED_BYTES[self._get_next_byte()]
+            val = (self.stack_pointer + offset) & 0xFFFF
 
-            return res & 0xFFFF
+            # Carries out of bits 3 and 7 of the low byte show up in bits 4 and 8 of the XOR
+            carries = self.stack_pointer ^ offset ^ val
+            registers[REG_F] = ((carries & 0x10) << 1) | ((carries & 0x100) >> 4)
 
-        # # match opcode.code:
-        if opcode.code == 0x09: self.hl.value = do_add(self.hl.value, self.bc.value)
-        elif opcode.code == 0x19: self.hl.value = do_add(self.hl.value, self.de.value)
-        elif opcode.code == 0x29: self.hl.value = do_add(self.hl.value, self.hl.value)
-        elif opcode.code == 0x39: self.hl.value = do_add(self.hl.value, self.stack_pointer)
-        elif opcode.code == 0xE8:
-            # 16 bit arithmetic but it doesn't follow the same flag conventions
-            offset = self._get_next_byte_signed()
-            val = self.stack_pointer + offset
-            self._update_zero_flag(False)
-            self._update_sub_flag(False)
-            self._update_carry_flag((self.stack_pointer & 0xFF) + (offset & 0xFF) > 0xFF)
-            self._update_half_carry_flag((self.stack_pointer & 0xF) + (offset & 0xF) > 0xF)
-            self.stack_pointer = val & 0xFFFF
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+            self.stack_pointer = val
+            return opcode.cycles
+
+        # ADD HL, rr - bits 4-5 of the opcode select BC, DE, HL or SP
+        if opcode.code == 0x39:
+            val = self.stack_pointer
+        else:
+            high = (opcode.code >> 4) * 2
+            val = (registers[high] << 8) | registers[high + 1]
+
+        hl = (registers[REG_H] << 8) | registers[REG_L]
+        res = hl + val
+
+        # The zero flag is left alone. A carry out of bit 11 shows up in bit 12 of the XOR and a
+        # carry out of bit 15 is bit 16 of the result
+        carries = hl ^ val ^ res
+        registers[REG_F] = (registers[REG_F] & FLAG_ZERO) | ((carries & 0x1000) >> 7) | ((res >> 12) & FLAG_CARRY)
+
+        registers[REG_H] = (res >> 8) & 0xFF
+        registers[REG_L] = res & 0xFF
 
         return opcode.cycles
 
@@ -570,40 +1395,9 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # # match opcode.code:
-        if opcode.code == 0xA0:
-            self.af.hi &= self.bc.hi
-            val = self.af.hi
-        elif opcode.code == 0xA1:
-            self.af.hi &= self.bc.lo
-            val = self.af.hi
-        elif opcode.code == 0xA2:
-            self.af.hi &= self.de.hi
-            val = self.af.hi
-        elif opcode.code == 0xA3:
-            self.af.hi &= self.de.lo
-            val = self.af.hi
-        elif opcode.code == 0xA4:
-            self.af.hi &= self.hl.hi
-            val = self.af.hi
-        elif opcode.code == 0xA5:
-            self.af.hi &= self.hl.lo
-            val = self.af.hi
-        elif opcode.code == 0xA6:
-            self.af.hi &= self._read_memory(self.hl.value)
-            val = self.af.hi
-        elif opcode.code == 0xA7:
-            self.af.hi &= self.af.hi
-            val = self.af.hi
-        elif opcode.code == 0xE6:
-            self.af.hi &= self._get_next_byte()
-            val = self.af.hi
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
-        self._update_zero_flag(val == 0)
-        self._update_half_carry_flag(True)
-        self._update_sub_flag(False)
-        self._update_carry_flag(False)
+        val = self.registers[REG_A] & self._read_operand(opcode.code)
+        self.registers[REG_A] = val
+        self.registers[REG_F] = FLAG_HALF_CARRY | (FLAG_ZERO if val == 0 else 0)
 
         return opcode.cycles
 
@@ -614,99 +1408,15 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x40: self._update_zero_flag(not is_bit_set(self.bc.hi, 0))
-        elif opcode.code == 0x41: self._update_zero_flag(not is_bit_set(self.bc.lo, 0))
-        elif opcode.code == 0x42: self._update_zero_flag(not is_bit_set(self.de.hi, 0))
-        elif opcode.code == 0x43: self._update_zero_flag(not is_bit_set(self.de.lo, 0))
-        elif opcode.code == 0x44: self._update_zero_flag(not is_bit_set(self.hl.hi, 0))
-        elif opcode.code == 0x45: self._update_zero_flag(not is_bit_set(self.hl.lo, 0))
-        elif opcode.code == 0x46:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 0))
-        elif opcode.code == 0x47: self._update_zero_flag(not is_bit_set(self.af.hi, 0))
-        elif opcode.code == 0x48: self._update_zero_flag(not is_bit_set(self.bc.hi, 1))
-        elif opcode.code == 0x49: self._update_zero_flag(not is_bit_set(self.bc.lo, 1))
-        elif opcode.code == 0x4A: self._update_zero_flag(not is_bit_set(self.de.hi, 1))
-        elif opcode.code == 0x4B: self._update_zero_flag(not is_bit_set(self.de.lo, 1))
-        elif opcode.code == 0x4C: self._update_zero_flag(not is_bit_set(self.hl.hi, 1))
-        elif opcode.code == 0x4D: self._update_zero_flag(not is_bit_set(self.hl.lo, 1))
-        elif opcode.code == 0x4E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 1))
-        elif opcode.code == 0x4F: self._update_zero_flag(not is_bit_set(self.af.hi, 1))
-        elif opcode.code == 0x50: self._update_zero_flag(not is_bit_set(self.bc.hi, 2))
-        elif opcode.code == 0x51: self._update_zero_flag(not is_bit_set(self.bc.lo, 2))
-        elif opcode.code == 0x52: self._update_zero_flag(not is_bit_set(self.de.hi, 2))
-        elif opcode.code == 0x53: self._update_zero_flag(not is_bit_set(self.de.lo, 2))
-        elif opcode.code == 0x54: self._update_zero_flag(not is_bit_set(self.hl.hi, 2))
-        elif opcode.code == 0x55: self._update_zero_flag(not is_bit_set(self.hl.lo, 2))
-        elif opcode.code == 0x56:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 2))
-        elif opcode.code == 0x57: self._update_zero_flag(not is_bit_set(self.af.hi, 2))
-        elif opcode.code == 0x58: self._update_zero_flag(not is_bit_set(self.bc.hi, 3))
-        elif opcode.code == 0x59: self._update_zero_flag(not is_bit_set(self.bc.lo, 3))
-        elif opcode.code == 0x5A: self._update_zero_flag(not is_bit_set(self.de.hi, 3))
-        elif opcode.code == 0x5B: self._update_zero_flag(not is_bit_set(self.de.lo, 3))
-        elif opcode.code == 0x5C: self._update_zero_flag(not is_bit_set(self.hl.hi, 3))
-        elif opcode.code == 0x5D: self._update_zero_flag(not is_bit_set(self.hl.lo, 3))
-        elif opcode.code == 0x5E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 3))
-        elif opcode.code == 0x5F: self._update_zero_flag(not is_bit_set(self.af.hi, 3))
-        elif opcode.code == 0x60: self._update_zero_flag(not is_bit_set(self.bc.hi, 4))
-        elif opcode.code == 0x61: self._update_zero_flag(not is_bit_set(self.bc.lo, 4))
-        elif opcode.code == 0x62: self._update_zero_flag(not is_bit_set(self.de.hi, 4))
-        elif opcode.code == 0x63: self._update_zero_flag(not is_bit_set(self.de.lo, 4))
-        elif opcode.code == 0x64: self._update_zero_flag(not is_bit_set(self.hl.hi, 4))
-        elif opcode.code == 0x65: self._update_zero_flag(not is_bit_set(self.hl.lo, 4))
-        elif opcode.code == 0x66:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 4))
-        elif opcode.code == 0x67: self._update_zero_flag(not is_bit_set(self.af.hi, 4))
-        elif opcode.code == 0x68: self._update_zero_flag(not is_bit_set(self.bc.hi, 5))
-        elif opcode.code == 0x69: self._update_zero_flag(not is_bit_set(self.bc.lo, 5))
-        elif opcode.code == 0x6A: self._update_zero_flag(not is_bit_set(self.de.hi, 5))
-        elif opcode.code == 0x6B: self._update_zero_flag(not is_bit_set(self.de.lo, 5))
-        elif opcode.code == 0x6C: self._update_zero_flag(not is_bit_set(self.hl.hi, 5))
-        elif opcode.code == 0x6D: self._update_zero_flag(not is_bit_set(self.hl.lo, 5))
-        elif opcode.code == 0x6E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 5))
-        elif opcode.code == 0x6F: self._update_zero_flag(not is_bit_set(self.af.hi, 5))
-        elif opcode.code == 0x70: self._update_zero_flag(not is_bit_set(self.bc.hi, 6))
-        elif opcode.code == 0x71: self._update_zero_flag(not is_bit_set(self.bc.lo, 6))
-        elif opcode.code == 0x72: self._update_zero_flag(not is_bit_set(self.de.hi, 6))
-        elif opcode.code == 0x73: self._update_zero_flag(not is_bit_set(self.de.lo, 6))
-        elif opcode.code == 0x74: self._update_zero_flag(not is_bit_set(self.hl.hi, 6))
-        elif opcode.code == 0x75: self._update_zero_flag(not is_bit_set(self.hl.lo, 6))
-        elif opcode.code == 0x76:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 6))
-        elif opcode.code == 0x77: self._update_zero_flag(not is_bit_set(self.af.hi, 6))
-        elif opcode.code == 0x78: self._update_zero_flag(not is_bit_set(self.bc.hi, 7))
-        elif opcode.code == 0x79: self._update_zero_flag(not is_bit_set(self.bc.lo, 7))
-        elif opcode.code == 0x7A: self._update_zero_flag(not is_bit_set(self.de.hi, 7))
-        elif opcode.code == 0x7B: self._update_zero_flag(not is_bit_set(self.de.lo, 7))
-        elif opcode.code == 0x7C: self._update_zero_flag(not is_bit_set(self.hl.hi, 7))
-        elif opcode.code == 0x7D: self._update_zero_flag(not is_bit_set(self.hl.lo, 7))
-        elif opcode.code == 0x7E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._update_zero_flag(not is_bit_set(val, 7))
-        elif opcode.code == 0x7F: self._update_zero_flag(not is_bit_set(self.af.hi, 7))
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Bits 3-5 of the opcode are the bit to test, the low 3 bits are the register
+        val = self._read_prefix_operand(opcode.code)
+
+        # Zero is set if the bit is clear, half carry is set, subtraction is cleared and carry is kept
+        flags = (self.registers[REG_F] & FLAG_CARRY) | FLAG_HALF_CARRY
+        if not (val >> ((opcode.code >> 3) & 0x7)) & 1:
+            flags |= FLAG_ZERO
 
-        self._update_half_carry_flag(True)
-        self._update_sub_flag(False)
+        self.registers[REG_F] = flags
 
         return opcode.cycles
 
@@ -718,74 +1428,27 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        cycles = opcode.cycles
+        addr = self._get_next_word()
 
-        # match opcode.code:
-        if opcode.code == 0xC4:
-            if not self._is_zero_flag_set():
-                addr = self._get_next_word()
-                self._push_word_to_stack(self.program_counter)
-                self.program_counter = addr
-            else:
-                self.program_counter += 2
-                cycles = opcode.alt_cycles
-        elif opcode.code == 0xCC:
-            if self._is_zero_flag_set():
-                addr = self._get_next_word()
-                self._push_word_to_stack(self.program_counter)
-                self.program_counter = addr
-            else:
-                self.program_counter += 2
-                cycles = opcode.alt_cycles
-        elif opcode.code == 0xCD:
-            addr = self._get_next_word()
-            self._push_word_to_stack(self.program_counter)
-            self.program_counter = addr
-        elif opcode.code == 0xD4:
-            if not self._is_carry_flag_set():
-                addr = self._get_next_word()
-                self._push_word_to_stack(self.program_counter)
-                self.program_counter = addr
-            else:
-                self.program_counter += 2
-                cycles = opcode.alt_cycles
-        elif opcode.code == 0xDC:
-            if self._is_carry_flag_set():
-                addr = self._get_next_word()
-                self._push_word_to_stack(self.program_counter)
-                self.program_counter = addr
-            else:
-                self.program_counter += 2
-                cycles = opcode.alt_cycles
+        # CALL a16 is unconditional, the rest only call if their condition is met
+        if opcode.code != 0xCD and not self._is_condition_met(opcode.code):
+            return opcode.alt_cycles
 
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        self._push_word_to_stack(self.program_counter)
+        self.program_counter = addr
 
-        return cycles
+        return opcode.cycles
 
     def _do_compare(self, opcode: OpCode) -> int:
         '''
-        Does a compare operation, and updates flags as appropriate
+        Does a compare operation, and updates flags as appropriate. This is a subtraction
+        that only keeps the flags
 
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_cp(val_1: int, val_2: int):
-            self._update_zero_flag(val_1 == val_2)
-            self._update_sub_flag(True)
-            self._update_carry_flag(val_1 < val_2)
-            self._update_half_carry_flag((val_1 & 0xF) - (val_2 & 0xF) < 0)
-
-        # match opcode.code:
-        if opcode.code == 0xB8: do_cp(self.af.hi, self.bc.hi)
-        elif opcode.code == 0xB9: do_cp(self.af.hi, self.bc.lo)
-        elif opcode.code == 0xBA: do_cp(self.af.hi, self.de.hi)
-        elif opcode.code == 0xBB: do_cp(self.af.hi, self.de.lo)
-        elif opcode.code == 0xBC: do_cp(self.af.hi, self.hl.hi)
-        elif opcode.code == 0xBD: do_cp(self.af.hi, self.hl.lo)
-        elif opcode.code == 0xBE: do_cp(self.af.hi, self._read_memory(self.hl.value))
-        elif opcode.code == 0xBF: do_cp(self.af.hi, self.af.hi)
-        elif opcode.code == 0xFE: do_cp(self.af.hi, self._get_next_byte())
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        val = self._read_operand(opcode.code)
+        self.registers[REG_F] = SUB_TABLE[(self.registers[REG_A] << 8) | val] >> 8
 
         return opcode.cycles
 
@@ -796,10 +1459,8 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        self.af.hi = bit_negate(self.af.hi)
-
-        self._update_half_carry_flag(True)
-        self._update_sub_flag(True)
+        self.registers[REG_A] ^= 0xFF
+        self.registers[REG_F] |= FLAG_SUBTRACTION | FLAG_HALF_CARRY
 
         return opcode.cycles
 
@@ -810,52 +1471,24 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        self._update_carry_flag(not self._is_carry_flag_set())
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
+        # Zero is kept, subtraction and half carry are cleared
+        self.registers[REG_F] = (self.registers[REG_F] & (FLAG_ZERO | FLAG_CARRY)) ^ FLAG_CARRY
 
         return opcode.cycles
 
     def _do_daa(self, opcode: OpCode) -> int:
         '''
-        Perform a DAA operation
-        This should adjust the value in register A so that it proper BCD represetnation
-        where the value SHOULD be the result of a previous ADD or SUB of two BCD numbers
-        To adjust properly, we need to add or subtract from the current value
-
-        This algorithm is complicated and should be understood better
+        Perform a DAA operation, adjusting register A so that it is a proper BCD representation.
+        The adjustment for every value of A and F is precomputed in DAA_TABLE
 
         :return the number of cycles needed to execute this operation
         '''
 
-        val = self.af.hi
-        should_set_carry = False
-
-        if not self._is_sub_flag_set():
-            if self._is_carry_flag_set() or val > 0x99:
-                val += 0x60
-                should_set_carry = True
+        registers = self.registers
+        res = DAA_TABLE[(registers[REG_F] << 4) | registers[REG_A]]
 
-            if self._is_half_carry_flag_set() or (val & 0x0F) > 0x09:
-                val += 0x6
-
-        else:
-            if self._is_carry_flag_set():
-                val -= 0x60
-                should_set_carry = True
-
-            if self._is_half_carry_flag_set():
-                val -= 0x6
-
-        val &= 0xFF
-        if val < 0:
-            val += 256
-
-        self._update_zero_flag(val == 0)
-        self._update_half_carry_flag(False)
-        self._update_carry_flag(should_set_carry)
-
-        self.af.hi = val
+        registers[REG_A] = res & 0xFF
+        registers[REG_F] = res >> 8
         return opcode.cycles
 
     def _do_decrement_8_bit(self, opcode: OpCode) -> int:
@@ -865,41 +1498,19 @@ class Cpu:
         :return the number of cycles need to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x05:
-            self.bc.decrement_hi()
-            val = self.bc.hi
-        elif opcode.code == 0x0D:
-            self.bc.decrement_lo()
-            val = self.bc.lo
-        elif opcode.code == 0x15:
-            self.de.decrement_hi()
-            val = self.de.hi
-        elif opcode.code == 0x1D:
-            self.de.decrement_lo()
-            val = self.de.lo
-        elif opcode.code == 0x25:
-            self.hl.decrement_hi()
-            val = self.hl.hi
-        elif opcode.code == 0x2D:
-            self.hl.decrement_lo()
-            val = self.hl.lo
-        elif opcode.code == 0x35:
-            val = self._read_memory(self.hl.value)
+        # Bits 3-5 of the opcode select the register, in the same order as _read_operand
+        registers = self.registers
+        dest = (opcode.code >> 3) & 0x7
+        if dest == 6:
+            addr = (registers[REG_H] << 8) | registers[REG_L]
+            val = (self._read_memory(addr) - 1) & 0xFF
             self._sync_cycles(4)
-            val -= 1
-            if val < 0:
-                val = 255
-            self._write_memory(self.hl.value, val)
-        elif opcode.code == 0x3D:
-            self.af.decrement_hi()
-            val = self.af.hi
-
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+            self._write_memory(addr, val)
+        else:
+            val = (registers[dest] - 1) & 0xFF
+            registers[dest] = val
 
-        self._update_zero_flag(val == 0)
-        self._update_sub_flag(True)
-        self._update_half_carry_flag(val & 0xF == 0xF)
+        registers[REG_F] = (registers[REG_F] & FLAG_CARRY) | DEC_FLAGS[val]
 
         return opcode.cycles
 
@@ -910,15 +1521,17 @@ class Cpu:
         :return the number of cycles need to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x0B: self.bc.decrement()
-        elif opcode.code == 0x1B: self.de.decrement()
-        elif opcode.code == 0x2B: self.hl.decrement()
-        elif opcode.code == 0x3B:
-            self.stack_pointer -= 1
-            if self.stack_pointer < 0:
-                self.stack_pointer = 0xFFFF
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Bits 4-5 of the opcode select BC, DE, HL or SP
+        if opcode.code == 0x3B:
+            self.stack_pointer = (self.stack_pointer - 1) & 0xFFFF
+            return opcode.cycles
+
+        registers = self.registers
+        high = (opcode.code >> 4) * 2
+
+        val = (((registers[high] << 8) | registers[high + 1]) - 1) & 0xFFFF
+        registers[high] = val >> 8
+        registers[high + 1] = val & 0xFF
 
         return opcode.cycles
 
@@ -929,7 +1542,9 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        self.will_enable_interrupts = False
+        # Takes effect immediately, and cancels any enable that is still pending from an EI
+        self.interrupts_enabled = False
+        self.enable_interrupts_countdown = 0
         return opcode.cycles
 
     def _do_enable_interrupts(self, opcode: OpCode) -> int:
@@ -939,7 +1554,10 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        self.will_enable_interrupts = True
+        # Takes effect after the instruction following this one. Counting this instruction
+        # too, that is two instructions away. A repeated EI doesn't push it back
+        if not self.enable_interrupts_countdown:
+            self.enable_interrupts_countdown = 2
         return opcode.cycles
 
     def _do_halt(self, opcode: OpCode) -> int:
@@ -960,41 +1578,19 @@ class Cpu:
         :return the number of cycles need to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x04:
-            self.bc.increment_hi()
-            val = self.bc.hi
-        elif opcode.code == 0x0C:
-            self.bc.increment_lo()
-            val = self.bc.lo
-        elif opcode.code == 0x14:
-            self.de.increment_hi()
-            val = self.de.hi
-        elif opcode.code == 0x1C:
-            self.de.increment_lo()
-            val = self.de.lo
-        elif opcode.code == 0x24:
-            self.hl.increment_hi()
-            val = self.hl.hi
-        elif opcode.code == 0x2C:
-            self.hl.increment_lo()
-            val = self.hl.lo
-        elif opcode.code == 0x34:
-            val = self._read_memory(self.hl.value)
+        # Bits 3-5 of the opcode select the register, in the same order as _read_operand
+        registers = self.registers
+        dest = (opcode.code >> 3) & 0x7
+        if dest == 6:
+            addr = (registers[REG_H] << 8) | registers[REG_L]
+            val = (self._read_memory(addr) + 1) & 0xFF
             self._sync_cycles(4)
-            val += 1
-            if val > 255:
-                val = 0
-            self._write_memory(self.hl.value, val)
-        elif opcode.code == 0x3C:
-            self.af.increment_hi()
-            val = self.af.hi
-
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+            self._write_memory(addr, val)
+        else:
+            val = (registers[dest] + 1) & 0xFF
+            registers[dest] = val
 
-        self._update_zero_flag(val == 0)
-        self._update_sub_flag(False)
-        self._update_half_carry_flag(val & 0xF == 0)
+        registers[REG_F] = (registers[REG_F] & FLAG_CARRY) | INC_FLAGS[val]
 
         return opcode.cycles
 
@@ -1005,15 +1601,17 @@ class Cpu:
         :return the number of cycles need to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x03: self.bc.increment()
-        elif opcode.code == 0x13: self.de.increment()
-        elif opcode.code == 0x23: self.hl.increment()
-        elif opcode.code == 0x33:
-            self.stack_pointer += 1
-            if self.stack_pointer > 0xFFFF:
-                self.stack_pointer = 0
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Bits 4-5 of the opcode select BC, DE, HL or SP
+        if opcode.code == 0x33:
+            self.stack_pointer = (self.stack_pointer + 1) & 0xFFFF
+            return opcode.cycles
+
+        registers = self.registers
+        high = (opcode.code >> 4) * 2
+
+        val = (((registers[high] << 8) | registers[high + 1]) + 1) & 0xFFFF
+        registers[high] = val >> 8
+        registers[high + 1] = val & 0xFF
 
         return opcode.cycles
 
@@ -1024,26 +1622,19 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        cycles = opcode.cycles
+        if opcode.code == 0xE9:
+            self.program_counter = (self.registers[REG_H] << 8) | self.registers[REG_L]
+            return opcode.cycles
 
-        # match opcode.code:
-        if opcode.code == 0xC2:
-            self.program_counter = self._get_next_word() if not self._is_zero_flag_set() else self.program_counter + 2
-            cycles = opcode.alt_cycles if self._is_zero_flag_set() else cycles
-        elif opcode.code == 0xC3: self.program_counter = self._get_next_word()
-        elif opcode.code == 0xCA:
-            self.program_counter = self._get_next_word() if self._is_zero_flag_set() else self.program_counter + 2
-            cycles = opcode.alt_cycles if not self._is_zero_flag_set() else cycles
-        elif opcode.code == 0xD2:
-            self.program_counter = self._get_next_word() if not self._is_carry_flag_set() else self.program_counter + 2
-            cycles = opcode.alt_cycles if self._is_carry_flag_set() else cycles
-        elif opcode.code == 0xDA:
-            self.program_counter = self._get_next_word() if self._is_carry_flag_set() else self.program_counter + 2
-            cycles = opcode.alt_cycles if not self._is_carry_flag_set() else cycles
-        elif opcode.code == 0xE9: self.program_counter = self.hl.value
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        addr = self._get_next_word()
 
-        return cycles
+        # JP a16 is unconditional, the rest only jump if their condition is met
+        if opcode.code != 0xC3 and not self._is_condition_met(opcode.code):
+            return opcode.alt_cycles
+
+        self.program_counter = addr
+
+        return opcode.cycles
 
     def _do_jump_relative(self, opcode: OpCode) -> int:
         '''
@@ -1053,29 +1644,15 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        cycles = opcode.cycles
+        offset = SIGNED_BYTES[self._get_next_byte()]
 
-        # match opcode.code:
-        if opcode.code == 0x18: self.program_counter = self._get_next_byte_signed() + self.program_counter
-        elif opcode.code == 0x20:
-            self.program_counter = self._get_next_byte_signed() + self.program_counter \
-                if not self._is_zero_flag_set() else self.program_counter + 1
-            cycles = opcode.alt_cycles if self._is_zero_flag_set() else cycles
-        elif opcode.code == 0x28:
-            self.program_counter = self._get_next_byte_signed() + self.program_counter \
-                if self._is_zero_flag_set() else self.program_counter + 1
-            cycles = opcode.alt_cycles if not self._is_zero_flag_set() else cycles
-        elif opcode.code == 0x30:
-            self.program_counter = self._get_next_byte_signed() + self.program_counter \
-                if not self._is_carry_flag_set() else self.program_counter + 1
-            cycles = opcode.alt_cycles if self._is_carry_flag_set() else cycles
-        elif opcode.code == 0x38:
-            self.program_counter = self._get_next_byte_signed() + self.program_counter \
-                if self._is_carry_flag_set() else self.program_counter + 1
-            cycles = opcode.alt_cycles if not self._is_carry_flag_set() else cycles
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # JR r8 is unconditional, the rest only jump if their condition is met
+        if opcode.code != 0x18 and not self._is_condition_met(opcode.code):
+            return opcode.alt_cycles
 
-        return cycles
+        self.program_counter = (self.program_counter + offset) & 0xFFFF
+
+        return opcode.cycles
 
     def _do_load(self, opcode: OpCode) -> int:
         '''
@@ -1084,143 +1661,54 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
+        code = opcode.code
+        registers = self.registers
+
         # match opcode.code:
-        if opcode.code == 0x01: self.bc.value = self._get_next_word()
-        elif opcode.code == 0x02: self._write_memory(self.bc.value, self.af.hi)
-        elif opcode.code == 0x06: self.bc.hi = self._get_next_byte()
-        elif opcode.code == 0x08:
+        if code == 0x08:
             addr = self._get_next_word()
             self._write_memory(addr, self.stack_pointer & 0xFF)
             self._write_memory(addr + 1, self.stack_pointer >> 8)
-        elif opcode.code == 0x0A: self.af.hi = self._read_memory(self.bc.value)
-        elif opcode.code == 0x0E: self.bc.lo = self._get_next_byte()
-        elif opcode.code == 0x11: self.de.value = self._get_next_word()
-        elif opcode.code == 0x12: self._write_memory(self.de.value, self.af.hi)
-        elif opcode.code == 0x16: self.de.hi = self._get_next_byte()
-        elif opcode.code == 0x1A: self.af.hi = self._read_memory(self.de.value)
-        elif opcode.code == 0x1E: self.de.lo = self._get_next_byte()
-        elif opcode.code == 0x21: self.hl.value = self._get_next_word()
-        elif opcode.code == 0x22:
-            self._write_memory(self.hl.value, self.af.hi)
-            self.hl.increment()
-        elif opcode.code == 0x26: self.hl.hi = self._get_next_byte()
-        elif opcode.code == 0x2A:
-            self.af.hi = self._read_memory(self.hl.value)
-            self.hl.increment()
-        elif opcode.code == 0x2E: self.hl.lo = self._get_next_byte()
-        elif opcode.code == 0x31: self.stack_pointer = self._get_next_word()
-        elif opcode.code == 0x32:
-            self._write_memory(self.hl.value, self.af.hi)
-            self.hl.decrement()
-        elif opcode.code == 0x36:
+        elif code == 0x31:
+            self.stack_pointer = self._get_next_word()
+        elif code == 0x36:
             self._sync_cycles(4)
-            self._write_memory(self.hl.value, self._get_next_byte())
-        elif opcode.code == 0x3A:
-            self.af.hi = self._read_memory(self.hl.value)
-            self.hl.decrement()
-        elif opcode.code == 0x40: self.bc.hi = self.bc.hi
-        elif opcode.code == 0x41: self.bc.hi = self.bc.lo
-        elif opcode.code == 0x42: self.bc.hi = self.de.hi
-        elif opcode.code == 0x43: self.bc.hi = self.de.lo
-        elif opcode.code == 0x44: self.bc.hi = self.hl.hi
-        elif opcode.code == 0x45: self.bc.hi = self.hl.lo
-        elif opcode.code == 0x46: self.bc.hi = self._read_memory(self.hl.value)
-        elif opcode.code == 0x47: self.bc.hi = self.af.hi
-        elif opcode.code == 0x48: self.bc.lo = self.bc.hi
-        elif opcode.code == 0x49: self.bc.lo = self.bc.lo
-        elif opcode.code == 0x4A: self.bc.lo = self.de.hi
-        elif opcode.code == 0x4B: self.bc.lo = self.de.lo
-        elif opcode.code == 0x4C: self.bc.lo = self.hl.hi
-        elif opcode.code == 0x4D: self.bc.lo = self.hl.lo
-        elif opcode.code == 0x4E: self.bc.lo = self._read_memory(self.hl.value)
-        elif opcode.code == 0x4F: self.bc.lo = self.af.hi
-        elif opcode.code == 0x50: self.de.hi = self.bc.hi
-        elif opcode.code == 0x51: self.de.hi = self.bc.lo
-        elif opcode.code == 0x52: self.de.hi = self.de.hi
-        elif opcode.code == 0x53: self.de.hi = self.de.lo
-        elif opcode.code == 0x54: self.de.hi = self.hl.hi
-        elif opcode.code == 0x55: self.de.hi = self.hl.lo
-        elif opcode.code == 0x56: self.de.hi = self._read_memory(self.hl.value)
-        elif opcode.code == 0x57: self.de.hi = self.af.hi
-        elif opcode.code == 0x58: self.de.lo = self.bc.hi
-        elif opcode.code == 0x59: self.de.lo = self.bc.lo
-        elif opcode.code == 0x5A: self.de.lo = self.de.hi
-        elif opcode.code == 0x5B: self.de.lo = self.de.lo
-        elif opcode.code == 0x5C: self.de.lo = self.hl.hi
-        elif opcode.code == 0x5D: self.de.lo = self.hl.lo
-        elif opcode.code == 0x5E: self.de.lo = self._read_memory(self.hl.value)
-        elif opcode.code == 0x5F: self.de.lo = self.af.hi
-        elif opcode.code == 0x60: self.hl.hi = self.bc.hi
-        elif opcode.code == 0x61: self.hl.hi = self.bc.lo
-        elif opcode.code == 0x62: self.hl.hi = self.de.hi
-        elif opcode.code == 0x63: self.hl.hi = self.de.lo
-        elif opcode.code == 0x64: self.hl.hi = self.hl.hi
-        elif opcode.code == 0x65: self.hl.hi = self.hl.lo
-        elif opcode.code == 0x66: self.hl.hi = self._read_memory(self.hl.value)
-        elif opcode.code == 0x67: self.hl.hi = self.af.hi
-        elif opcode.code == 0x68: self.hl.lo = self.bc.hi
-        elif opcode.code == 0x69: self.hl.lo = self.bc.lo
-        elif opcode.code == 0x6A: self.hl.lo = self.de.hi
-        elif opcode.code == 0x6B: self.hl.lo = self.de.lo
-        elif opcode.code == 0x6C: self.hl.lo = self.hl.hi
-        elif opcode.code == 0x6D: self.hl.lo = self.hl.lo
-        elif opcode.code == 0x6E: self.hl.lo = self._read_memory(self.hl.value)
-        elif opcode.code == 0x6F: self.hl.lo = self.af.hi
-        elif opcode.code == 0x70: self._write_memory(self.hl.value, self.bc.hi)
-        elif opcode.code == 0x71: self._write_memory(self.hl.value, self.bc.lo)
-        elif opcode.code == 0x72: self._write_memory(self.hl.value, self.de.hi)
-        elif opcode.code == 0x73: self._write_memory(self.hl.value, self.de.lo)
-        elif opcode.code == 0x74: self._write_memory(self.hl.value, self.hl.hi)
-        elif opcode.code == 0x75: self._write_memory(self.hl.value, self.hl.lo)
-        elif opcode.code == 0x77: self._write_memory(self.hl.value, self.af.hi)
-        elif opcode.code == 0x78: self.af.hi = self.bc.hi
-        elif opcode.code == 0x79: self.af.hi = self.bc.lo
-        elif opcode.code == 0x7A: self.af.hi = self.de.hi
-        elif opcode.code == 0x7B: self.af.hi = self.de.lo
-        elif opcode.code == 0x7C: self.af.hi = self.hl.hi
-        elif opcode.code == 0x7D: self.af.hi = self.hl.lo
-        elif opcode.code == 0x7E: self.af.hi = self._read_memory(self.hl.value)
-        elif opcode.code == 0x7F: self.af.hi = self.af.hi
-        elif opcode.code == 0x3E: self.af.hi = self._get_next_byte()
-        elif opcode.code == 0xE2: self._write_memory(0xFF00 + self.bc.lo, self.af.hi)
-        elif opcode.code == 0xEA:
+            self._write_memory((registers[REG_H] << 8) | registers[REG_L], self._get_next_byte())
+        elif code == 0xE2:
+            self._write_memory(0xFF00 + registers[REG_C], registers[REG_A])
+        elif code == 0xEA:
             self._sync_cycles(8)
-            self._write_memory(self._get_next_word(), self.af.hi)
-        elif opcode.code == 0xF2: self.af.hi = self._read_memory(0xFF00 + self.bc.lo)
-        elif opcode.code == 0xF8:
-            offset = self._get_next_byte_signed()
-            self.hl.value = self.stack_pointer + offset
-            self._update_zero_flag(False)
-            self._update_sub_flag(False)
-            self._update_carry_flag((self.stack_pointer & 0xFF) + (offset & 0xFF) > 0xFF)
-            self._update_half_carry_flag((self.stack_pointer & 0xF) + (offset & 0xF) > 0xF)
-        elif opcode.code == 0xF9: self.stack_pointer = self.hl.value
-        elif opcode.code == 0xFA:
+            self._write_memory(self._get_next_word(), registers[REG_A])
+        elif code == 0xF2:
+            registers[REG_A] = self._read_memory(0xFF00 + registers[REG_C])
+        elif code == 0xF8:
+            offset = SIGNED_BYTES[self._get_next_byte()]
+            val = (self.stack_pointer + offset) & 0xFFFF
+
+            # Same flags as ADD SP, r8 - carries out of bits 3 and 7 show up in bits 4 and 8 of the XOR
+            carries = self.stack_pointer ^ offset ^ val
+            registers[REG_F] = ((carries & 0x10) << 1) | ((carries & 0x100) >> 4)
+
+            registers[REG_H] = val >> 8
+            registers[REG_L] = val & 0xFF
+        elif code == 0xF9:
+            self.stack_pointer = (registers[REG_H] << 8) | registers[REG_L]
+        elif code == 0xFA:
             word = self._get_next_word()
             self._sync_cycles(8)
-            self.af.hi = self._read_memory(word)
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+            registers[REG_A] = self._read_memory(word)
+        else:
+            raise Exception(f"Unknown operation encountered 0x{format(code, '02x')} - {opcode.mnemonic}")
 
         return opcode.cycles
 
-    def _do_load_h(self, opcode: OpCode) -> int:
+    def _do_nop(self, opcode: OpCode) -> int:
         '''
-        Do a load instruction where address in instruction is least significant byte of address
-        and most significant byte is 0xFF
+        Do nothing for an instruction
 
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xE0:
-            self._sync_cycles(4)
-            self._write_memory(0xFF00 | self._get_next_byte(), self.af.hi)
-        elif opcode.code == 0xF0:
-            data = self._get_next_byte()
-            self._sync_cycles(4)
-            self.af.hi = self._read_memory(0xFF00 | data)
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
         return opcode.cycles
 
     def _do_or(self, opcode: OpCode) -> int:
@@ -1230,40 +1718,9 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xB0:
-            self.af.hi |= self.bc.hi
-            val = self.af.hi
-        elif opcode.code == 0xB1:
-            self.af.hi |= self.bc.lo
-            val = self.af.hi
-        elif opcode.code == 0xB2:
-            self.af.hi |= self.de.hi
-            val = self.af.hi
-        elif opcode.code == 0xB3:
-            self.af.hi |= self.de.lo
-            val = self.af.hi
-        elif opcode.code == 0xB4:
-            self.af.hi |= self.hl.hi
-            val = self.af.hi
-        elif opcode.code == 0xB5:
-            self.af.hi |= self.hl.lo
-            val = self.af.hi
-        elif opcode.code == 0xB6:
-            self.af.hi |= self._read_memory(self.hl.value)
-            val = self.af.hi
-        elif opcode.code == 0xB7:
-            self.af.hi |= self.af.hi
-            val = self.af.hi
-        elif opcode.code == 0xF6:
-            self.af.hi |= self._get_next_byte()
-            val = self.af.hi
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
-        self._update_zero_flag(val == 0)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-        self._update_carry_flag(False)
+        val = self.registers[REG_A] | self._read_operand(opcode.code)
+        self.registers[REG_A] = val
+        self.registers[REG_F] = FLAG_ZERO if val == 0 else 0
 
         return opcode.cycles
 
@@ -1274,18 +1731,16 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xC1: self.bc.value = self._pop_word_from_stack()
-        elif opcode.code == 0xD1: self.de.value = self._pop_word_from_stack()
-        elif opcode.code == 0xE1: self.hl.value = self._pop_word_from_stack()
-        elif opcode.code == 0xF1:
-            self.af.value = self._pop_word_from_stack()
-            self.af.lo &= 0xF0  # The lower bits of the Flags register are never set
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        high, low = STACK_REGISTER_PAIRS[(opcode.code >> 4) & 0x3]
+        word = self._pop_word_from_stack()
+
+        self.registers[high] = word >> 8
+        self.registers[low] = word & 0xFF
+        self.registers[REG_F] &= 0xF0  # The lower bits of the Flags register are never set
 
         return opcode.cycles
 
-    def _do_prefix(self) -> int:
+    def _do_prefix(self, opcode: OpCode) -> int:
         '''
         Do a prefix operation, from the CB opcode
 
@@ -1293,23 +1748,9 @@ class Cpu:
         '''
 
         op = self._read_memory(self.program_counter)
-        opcode = prefix_opcodes_map[op]
-
         self.program_counter = (self.program_counter + 1) & 0xFFFF
 
-        # match opcode.operation:
-        if opcode.operation == Operation.BIT: return self._do_bit(opcode)
-        elif opcode.operation == Operation.RES: return self._do_res(opcode)
-        elif opcode.operation == Operation.RL: return self._do_rl(opcode, through_carry=True)
-        elif opcode.operation == Operation.RLC: return self._do_rl(opcode, through_carry=False)
-        elif opcode.operation == Operation.RR: return self._do_rr(opcode, through_carry=True)
-        elif opcode.operation == Operation.RRC: return self._do_rr(opcode, through_carry=False)
-        elif opcode.operation == Operation.SET: return self._do_set(opcode)
-        elif opcode.operation == Operation.SLA: return self._do_shift_left(opcode)
-        elif opcode.operation == Operation.SRA: return self._do_shift_right(opcode, maintain_msb=True)
-        elif opcode.operation == Operation.SRL: return self._do_shift_right(opcode)
-        elif opcode.operation == Operation.SWAP: return self._do_swap(opcode)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(op, '02x')} - {opcode.mnemonic}")
+        return self.prefix_handlers[op](prefix_opcodes_map[op])
 
     def _do_push(self, opcode: OpCode) -> int:
         '''
@@ -1318,16 +1759,8 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xC5:
-            self._push_word_to_stack(self.bc.value)
-        elif opcode.code == 0xD5:
-            self._push_word_to_stack(self.de.value)
-        elif opcode.code == 0xE5:
-            self._push_word_to_stack(self.hl.value)
-        elif opcode.code == 0xF5:
-            self._push_word_to_stack(self.af.value)
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        high, low = STACK_REGISTER_PAIRS[(opcode.code >> 4) & 0x3]
+        self._push_word_to_stack((self.registers[high] << 8) | self.registers[low])
 
         return opcode.cycles
 
@@ -1338,32 +1771,16 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        cycles = opcode.cycles
+        # RET and RETI are unconditional, the rest only return if their condition is met
+        if opcode.code != 0xC9 and opcode.code != 0xD9 and not self._is_condition_met(opcode.code):
+            return opcode.alt_cycles
 
-        # match opcode.code:
-        if opcode.code == 0xC0:
-            self.program_counter = self._pop_word_from_stack() \
-                if not self._is_zero_flag_set() else self.program_counter
-            cycles = opcode.alt_cycles if self._is_zero_flag_set() else cycles
-        elif opcode.code == 0xC8:
-            self.program_counter = self._pop_word_from_stack() \
-                if self._is_zero_flag_set() else self.program_counter
-            cycles = opcode.alt_cycles if not self._is_zero_flag_set() else cycles
-        elif opcode.code == 0xC9: self.program_counter = self._pop_word_from_stack()
-        elif opcode.code == 0xD0:
-            self.program_counter = self._pop_word_from_stack() \
-                if not self._is_carry_flag_set() else self.program_counter
-            cycles = opcode.alt_cycles if self._is_carry_flag_set() else cycles
-        elif opcode.code == 0xD8:
-            self.program_counter = self._pop_word_from_stack() \
-                if self._is_carry_flag_set() else self.program_counter
-            cycles = opcode.alt_cycles if not self._is_carry_flag_set() else cycles
-        elif opcode.code == 0xD9:
-            self.program_counter = self._pop_word_from_stack()
+        self.program_counter = self._pop_word_from_stack()
+
+        if opcode.code == 0xD9:
             self.interrupts_enabled = True
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
 
-        return cycles
+        return opcode.cycles
 
     def _do_res(self, opcode: OpCode) -> int:
         '''
@@ -1372,108 +1789,12 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0x80: self.bc.hi = reset_bit(self.bc.hi, 0)
-        elif opcode.code == 0x81: self.bc.lo = reset_bit(self.bc.lo, 0)
-        elif opcode.code == 0x82: self.de.hi = reset_bit(self.de.hi, 0)
-        elif opcode.code == 0x83: self.de.lo = reset_bit(self.de.lo, 0)
-        elif opcode.code == 0x84: self.hl.hi = reset_bit(self.hl.hi, 0)
-        elif opcode.code == 0x85: self.hl.lo = reset_bit(self.hl.lo, 0)
-        elif opcode.code == 0x86:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 0))
-        elif opcode.code == 0x87: self.af.hi = reset_bit(self.af.hi, 0)
-        elif opcode.code == 0x88: self.bc.hi = reset_bit(self.bc.hi, 1)
-        elif opcode.code == 0x89: self.bc.lo = reset_bit(self.bc.lo, 1)
-        elif opcode.code == 0x8A: self.de.hi = reset_bit(self.de.hi, 1)
-        elif opcode.code == 0x8B: self.de.lo = reset_bit(self.de.lo, 1)
-        elif opcode.code == 0x8C: self.hl.hi = reset_bit(self.hl.hi, 1)
-        elif opcode.code == 0x8D: self.hl.lo = reset_bit(self.hl.lo, 1)
-        elif opcode.code == 0x8E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 1))
-        elif opcode.code == 0x8F: self.af.hi = reset_bit(self.af.hi, 1)
-        elif opcode.code == 0x90: self.bc.hi = reset_bit(self.bc.hi, 2)
-        elif opcode.code == 0x91: self.bc.lo = reset_bit(self.bc.lo, 2)
-        elif opcode.code == 0x92: self.de.hi = reset_bit(self.de.hi, 2)
-        elif opcode.code == 0x93: self.de.lo = reset_bit(self.de.lo, 2)
-        elif opcode.code == 0x94: self.hl.hi = reset_bit(self.hl.hi, 2)
-        elif opcode.code == 0x95: self.hl.lo = reset_bit(self.hl.lo, 2)
-        elif opcode.code == 0x96:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 2))
-        elif opcode.code == 0x97: self.af.hi = reset_bit(self.af.hi, 2)
-        elif opcode.code == 0x98: self.bc.hi = reset_bit(self.bc.hi, 3)
-        elif opcode.code == 0x99: self.bc.lo = reset_bit(self.bc.lo, 3)
-        elif opcode.code == 0x9A: self.de.hi = reset_bit(self.de.hi, 3)
-        elif opcode.code == 0x9B: self.de.lo = reset_bit(self.de.lo, 3)
-        elif opcode.code == 0x9C: self.hl.hi = reset_bit(self.hl.hi, 3)
-        elif opcode.code == 0x9D: self.hl.lo = reset_bit(self.hl.lo, 3)
-        elif opcode.code == 0x9E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 3))
-        elif opcode.code == 0x9F: self.af.hi = reset_bit(self.af.hi, 3)
-        elif opcode.code == 0xA0: self.bc.hi = reset_bit(self.bc.hi, 4)
-        elif opcode.code == 0xA1: self.bc.lo = reset_bit(self.bc.lo, 4)
-        elif opcode.code == 0xA2: self.de.hi = reset_bit(self.de.hi, 4)
-        elif opcode.code == 0xA3: self.de.lo = reset_bit(self.de.lo, 4)
-        elif opcode.code == 0xA4: self.hl.hi = reset_bit(self.hl.hi, 4)
-        elif opcode.code == 0xA5: self.hl.lo = reset_bit(self.hl.lo, 4)
-        elif opcode.code == 0xA6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 4))
-        elif opcode.code == 0xA7: self.af.hi = reset_bit(self.af.hi, 4)
-        elif opcode.code == 0xA8: self.bc.hi = reset_bit(self.bc.hi, 5)
-        elif opcode.code == 0xA9: self.bc.lo = reset_bit(self.bc.lo, 5)
-        elif opcode.code == 0xAA: self.de.hi = reset_bit(self.de.hi, 5)
-        elif opcode.code == 0xAB: self.de.lo = reset_bit(self.de.lo, 5)
-        elif opcode.code == 0xAC: self.hl.hi = reset_bit(self.hl.hi, 5)
-        elif opcode.code == 0xAD: self.hl.lo = reset_bit(self.hl.lo, 5)
-        elif opcode.code == 0xAE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 5))
-        elif opcode.code == 0xAF: self.af.hi = reset_bit(self.af.hi, 5)
-        elif opcode.code == 0xB0: self.bc.hi = reset_bit(self.bc.hi, 6)
-        elif opcode.code == 0xB1: self.bc.lo = reset_bit(self.bc.lo, 6)
-        elif opcode.code == 0xB2: self.de.hi = reset_bit(self.de.hi, 6)
-        elif opcode.code == 0xB3: self.de.lo = reset_bit(self.de.lo, 6)
-        elif opcode.code == 0xB4: self.hl.hi = reset_bit(self.hl.hi, 6)
-        elif opcode.code == 0xB5: self.hl.lo = reset_bit(self.hl.lo, 6)
-        elif opcode.code == 0xB6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 6))
-        elif opcode.code == 0xB7: self.af.hi = reset_bit(self.af.hi, 6)
-        elif opcode.code == 0xB8: self.bc.hi = reset_bit(self.bc.hi, 7)
-        elif opcode.code == 0xB9: self.bc.lo = reset_bit(self.bc.lo, 7)
-        elif opcode.code == 0xBA: self.de.hi = reset_bit(self.de.hi, 7)
-        elif opcode.code == 0xBB: self.de.lo = reset_bit(self.de.lo, 7)
-        elif opcode.code == 0xBC: self.hl.hi = reset_bit(self.hl.hi, 7)
-        elif opcode.code == 0xBD: self.hl.lo = reset_bit(self.hl.lo, 7)
-        elif opcode.code == 0xBE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, reset_bit(val, 7))
-        elif opcode.code == 0xBF: self.af.hi = reset_bit(self.af.hi, 7)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Bits 3-5 of the opcode are the bit to reset, the low 3 bits are the register
+        val = self._read_prefix_operand(opcode.code)
+        self._write_prefix_operand(opcode.code, val & ~(1 << ((opcode.code >> 3) & 0x7)))
 
         return opcode.cycles
 
-
     def _do_restart(self, opcode: OpCode) -> int:
         '''
         Push current program counter to stack and then restart from predefined address (0x0000 + n)
@@ -1483,180 +1804,40 @@ class Cpu:
 
         self._push_word_to_stack(self.program_counter)
 
-        # match opcode.code:
-        if opcode.code == 0xC7: self.program_counter = 0x00
-        elif opcode.code == 0xCF: self.program_counter = 0x08
-        elif opcode.code == 0xD7: self.program_counter = 0x10
-        elif opcode.code == 0xDF: self.program_counter = 0x18
-        elif opcode.code == 0xE7: self.program_counter = 0x20
-        elif opcode.code == 0xEF: self.program_counter = 0x28
-        elif opcode.code == 0xF7: self.program_counter = 0x30
-        elif opcode.code == 0xFF: self.program_counter = 0x38
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
+        # RST n is 0xC7 | n, so the restart address is bits 3-5 of the opcode
+        self.program_counter = opcode.code & 0x38
 
         return opcode.cycles
 
-    def _do_rl(self, opcode: OpCode, through_carry=False) -> int:
+    def _do_rotate(self, opcode: OpCode) -> int:
         '''
-        Rotate value left
+        Do a CB rotate or shift (RLC, RRC, RL, RR, SLA, SRA, SRL or SWAP), looking up the result
+        and flags for the operation in ROTATE_TABLES
 
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_rl(val):
-            most_significant_bit = get_bit_val(val, 7)
-            carry_bit = 1 if self._is_carry_flag_set() else 0
-            res = (val << 1) | (carry_bit if through_carry else most_significant_bit)
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_carry_flag(most_significant_bit == 1)
-            self._update_half_carry_flag(False)
-            self._update_sub_flag(False)
-
-            return res & 0xFF
-
-        # match opcode.code:
-        if opcode.code == 0x00: self.bc.hi = do_rl(self.bc.hi)
-        elif opcode.code == 0x01: self.bc.lo = do_rl(self.bc.lo)
-        elif opcode.code == 0x02: self.de.hi = do_rl(self.de.hi)
-        elif opcode.code == 0x03: self.de.lo = do_rl(self.de.lo)
-        elif opcode.code == 0x04: self.hl.hi = do_rl(self.hl.hi)
-        elif opcode.code == 0x05: self.hl.lo = do_rl(self.hl.lo)
-        elif opcode.code == 0x06:
-            # breakpoint()
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_rl(val))
-        elif opcode.code == 0x07: self.af.hi = do_rl(self.af.hi)
-        elif opcode.code == 0x10: self.bc.hi = do_rl(self.bc.hi)
-        elif opcode.code == 0x11: self.bc.lo = do_rl(self.bc.lo)
-        elif opcode.code == 0x12: self.de.hi = do_rl(self.de.hi)
-        elif opcode.code == 0x13: self.de.lo = do_rl(self.de.lo)
-        elif opcode.code == 0x14: self.hl.hi = do_rl(self.hl.hi)
-        elif opcode.code == 0x15: self.hl.lo = do_rl(self.hl.lo)
-        elif opcode.code == 0x16:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_rl(val))
-        elif opcode.code == 0x17: self.af.hi = do_rl(self.af.hi)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
-        return opcode.cycles
-
-    def _do_rlca(self, opcode: OpCode) -> int:
-        '''
-        Rotate A register left setting carry to bit 7, ensuring zero flag is set to 0
-        '''
-
-        most_significant_bit = get_bit_val(self.af.hi, 7)
-        res =  (self.af.hi << 1) | most_significant_bit
+        val = self._read_prefix_operand(opcode.code)
+        res = ROTATE_TABLES[opcode.operation][((self.registers[REG_F] & FLAG_CARRY) << 4) | val]
 
-        self._update_zero_flag(False)
-        self._update_carry_flag(most_significant_bit == 1)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
+        self.registers[REG_F] = res >> 8
+        self._write_prefix_operand(opcode.code, res & 0xFF)
 
-        self.af.hi = res & 0xFF
         return opcode.cycles
 
-    def _do_rla(self, opcode: OpCode) -> int:
-        '''
-        Rotate A register left through the carry flag, ensuring zero flag is set to 0
-        '''
-
-        most_significant_bit = get_bit_val(self.af.hi, 7)
-        carry_bit = 1 if self._is_carry_flag_set() else 0
-        res =  (self.af.hi << 1) | carry_bit
-
-        self._update_zero_flag(False)
-        self._update_carry_flag(most_significant_bit == 1)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-
-        self.af.hi = res & 0xFF
-        return opcode.cycles
-
-    def _do_rra(self, opcode: OpCode) -> int:
-        '''
-        Rotate A register right through the carry flag, ensuring zero flag is set to 0
+    def _do_rotate_a(self, opcode: OpCode) -> int:
         '''
-
-        least_significant_bit = get_bit_val(self.af.hi, 0)
-        carry_bit = 1 if self._is_carry_flag_set() else 0
-        res = (carry_bit << 7) | (self.af.hi >> 1)
-
-        self._update_zero_flag(False)
-        self._update_carry_flag(least_significant_bit == 1)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-
-        self.af.hi = res & 0xFF
-        return opcode.cycles
-
-    def _do_rrca(self, opcode: OpCode) -> int:
-        '''
-        Rotate A register rigjt setting carry to bit 0, ensuring zero flag is set to 0
-        '''
-
-        least_significant_bit = get_bit_val(self.af.hi, 0)
-        res =  (least_significant_bit << 7) | (self.af.hi >> 1)
-
-        self._update_zero_flag(False)
-        self._update_carry_flag(least_significant_bit == 1)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-
-        self.af.hi = res & 0xFF
-        return opcode.cycles
-
-    def _do_rr(self, opcode: OpCode, through_carry=False) -> int:
-        '''
-        Rotate value right
+        Rotate A (RLCA, RRCA, RLA or RRA), looking up the result and flags in A_ROTATE_TABLES
 
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_rr(val):
-            least_significant_bit = get_bit_val(val, 0)
-            carry_bit = 1 if self._is_carry_flag_set() else 0
-            res = (carry_bit << 7 if through_carry else least_significant_bit << 7) | (val >> 1)
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_carry_flag(least_significant_bit == 1)
-            self._update_half_carry_flag(False)
-            self._update_sub_flag(False)
+        registers = self.registers
+        res = A_ROTATE_TABLES[(opcode.code >> 3) & 0x3][((registers[REG_F] & FLAG_CARRY) << 4) | registers[REG_A]]
 
-            return res & 0xFF
-
-        # match opcode.code:
-        if opcode.code == 0x08: self.bc.hi = do_rr(self.bc.hi)
-        elif opcode.code == 0x09: self.bc.lo = do_rr(self.bc.lo)
-        elif opcode.code == 0x0A: self.de.hi = do_rr(self.de.hi)
-        elif opcode.code == 0x0B: self.de.lo = do_rr(self.de.lo)
-        elif opcode.code == 0x0C: self.hl.hi = do_rr(self.hl.hi)
-        elif opcode.code == 0x0D: self.hl.lo = do_rr(self.hl.lo)
-        elif opcode.code == 0x0E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_rr(val))
-        elif opcode.code == 0x0F: self.af.hi = do_rr(self.af.hi)
-        elif opcode.code == 0x18: self.bc.hi = do_rr(self.bc.hi)
-        elif opcode.code == 0x19: self.bc.lo = do_rr(self.bc.lo)
-        elif opcode.code == 0x1A: self.de.hi = do_rr(self.de.hi)
-        elif opcode.code == 0x1B: self.de.lo = do_rr(self.de.lo)
-        elif opcode.code == 0x1C: self.hl.hi = do_rr(self.hl.hi)
-        elif opcode.code == 0x1D: self.hl.lo = do_rr(self.hl.lo)
-        elif opcode.code == 0x1E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_rr(val))
-        elif opcode.code == 0x1F: self.af.hi = do_rr(self.af.hi)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Unlike the CB rotates the zero flag is always cleared, so only carry is kept
+        registers[REG_A] = res & 0xFF
+        registers[REG_F] = (res >> 8) & FLAG_CARRY
 
         return opcode.cycles
 
@@ -1667,104 +1848,9 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xC0: self.bc.hi = set_bit(self.bc.hi, 0)
-        elif opcode.code == 0xC1: self.bc.lo = set_bit(self.bc.lo, 0)
-        elif opcode.code == 0xC2: self.de.hi = set_bit(self.de.hi, 0)
-        elif opcode.code == 0xC3: self.de.lo = set_bit(self.de.lo, 0)
-        elif opcode.code == 0xC4: self.hl.hi = set_bit(self.hl.hi, 0)
-        elif opcode.code == 0xC5: self.hl.lo = set_bit(self.hl.lo, 0)
-        elif opcode.code == 0xC6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 0))
-        elif opcode.code == 0xC7: self.af.hi = set_bit(self.af.hi, 0)
-        elif opcode.code == 0xC8: self.bc.hi = set_bit(self.bc.hi, 1)
-        elif opcode.code == 0xC9: self.bc.lo = set_bit(self.bc.lo, 1)
-        elif opcode.code == 0xCA: self.de.hi = set_bit(self.de.hi, 1)
-        elif opcode.code == 0xCB: self.de.lo = set_bit(self.de.lo, 1)
-        elif opcode.code == 0xCC: self.hl.hi = set_bit(self.hl.hi, 1)
-        elif opcode.code == 0xCD: self.hl.lo = set_bit(self.hl.lo, 1)
-        elif opcode.code == 0xCE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 1))
-        elif opcode.code == 0xCF: self.af.hi = set_bit(self.af.hi, 1)
-        elif opcode.code == 0xD0: self.bc.hi = set_bit(self.bc.hi, 2)
-        elif opcode.code == 0xD1: self.bc.lo = set_bit(self.bc.lo, 2)
-        elif opcode.code == 0xD2: self.de.hi = set_bit(self.de.hi, 2)
-        elif opcode.code == 0xD3: self.de.lo = set_bit(self.de.lo, 2)
-        elif opcode.code == 0xD4: self.hl.hi = set_bit(self.hl.hi, 2)
-        elif opcode.code == 0xD5: self.hl.lo = set_bit(self.hl.lo, 2)
-        elif opcode.code == 0xD6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 2))
-        elif opcode.code == 0xD7: self.af.hi = set_bit(self.af.hi, 2)
-        elif opcode.code == 0xD8: self.bc.hi = set_bit(self.bc.hi, 3)
-        elif opcode.code == 0xD9: self.bc.lo = set_bit(self.bc.lo, 3)
-        elif opcode.code == 0xDA: self.de.hi = set_bit(self.de.hi, 3)
-        elif opcode.code == 0xDB: self.de.lo = set_bit(self.de.lo, 3)
-        elif opcode.code == 0xDC: self.hl.hi = set_bit(self.hl.hi, 3)
-        elif opcode.code == 0xDD: self.hl.lo = set_bit(self.hl.lo, 3)
-        elif opcode.code == 0xDE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 3))
-        elif opcode.code == 0xDF: self.af.hi = set_bit(self.af.hi, 3)
-        elif opcode.code == 0xE0: self.bc.hi = set_bit(self.bc.hi, 4)
-        elif opcode.code == 0xE1: self.bc.lo = set_bit(self.bc.lo, 4)
-        elif opcode.code == 0xE2: self.de.hi = set_bit(self.de.hi, 4)
-        elif opcode.code == 0xE3: self.de.lo = set_bit(self.de.lo, 4)
-        elif opcode.code == 0xE4: self.hl.hi = set_bit(self.hl.hi, 4)
-        elif opcode.code == 0xE5: self.hl.lo = set_bit(self.hl.lo, 4)
-        elif opcode.code == 0xE6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 4))
-        elif opcode.code == 0xE7: self.af.hi = set_bit(self.af.hi, 4)
-        elif opcode.code == 0xE8: self.bc.hi = set_bit(self.bc.hi, 5)
-        elif opcode.code == 0xE9: self.bc.lo = set_bit(self.bc.lo, 5)
-        elif opcode.code == 0xEA: self.de.hi = set_bit(self.de.hi, 5)
-        elif opcode.code == 0xEB: self.de.lo = set_bit(self.de.lo, 5)
-        elif opcode.code == 0xEC: self.hl.hi = set_bit(self.hl.hi, 5)
-        elif opcode.code == 0xED: self.hl.lo = set_bit(self.hl.lo, 5)
-        elif opcode.code == 0xEE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 5))
-        elif opcode.code == 0xEF: self.af.hi = set_bit(self.af.hi, 5)
-        elif opcode.code == 0xF0: self.bc.hi = set_bit(self.bc.hi, 6)
-        elif opcode.code == 0xF1: self.bc.lo = set_bit(self.bc.lo, 6)
-        elif opcode.code == 0xF2: self.de.hi = set_bit(self.de.hi, 6)
-        elif opcode.code == 0xF3: self.de.lo = set_bit(self.de.lo, 6)
-        elif opcode.code == 0xF4: self.hl.hi = set_bit(self.hl.hi, 6)
-        elif opcode.code == 0xF5: self.hl.lo = set_bit(self.hl.lo, 6)
-        elif opcode.code == 0xF6:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 6))
-        elif opcode.code == 0xF7: self.af.hi = set_bit(self.af.hi, 6)
-        elif opcode.code == 0xF8: self.bc.hi = set_bit(self.bc.hi, 7)
-        elif opcode.code == 0xF9: self.bc.lo = set_bit(self.bc.lo, 7)
-        elif opcode.code == 0xFA: self.de.hi = set_bit(self.de.hi, 7)
-        elif opcode.code == 0xFB: self.de.lo = set_bit(self.de.lo, 7)
-        elif opcode.code == 0xFC: self.hl.hi = set_bit(self.hl.hi, 7)
-        elif opcode.code == 0xFD: self.hl.lo = set_bit(self.hl.lo, 7)
-        elif opcode.code == 0xFE:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, set_bit(val, 7))
-        elif opcode.code == 0xFF: self.af.hi = set_bit(self.af.hi, 7)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        # Bits 3-5 of the opcode are the bit to set, the low 3 bits are the register
+        val = self._read_prefix_operand(opcode.code)
+        self._write_prefix_operand(opcode.code, val | (1 << ((opcode.code >> 3) & 0x7)))
 
         return opcode.cycles
 
@@ -1775,240 +1861,91 @@ class Cpu:
         :return the number of cycles needed to execute this operation
         '''
 
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-        self._update_carry_flag(True)
+        # Zero is kept, subtraction and half carry are cleared
+        self.registers[REG_F] = (self.registers[REG_F] & FLAG_ZERO) | FLAG_CARRY
 
         return opcode.cycles
 
-    def _do_shift_left(self, opcode: OpCode) -> int:
+    def _do_sub_8_bit(self, opcode: OpCode, with_carry=False) -> int:
         '''
-        Shift register bits left into carry flag, least significant bit should be 0
+        Performs an 8-bit sub operation and stores result in A, setting appropriate flags
 
-        :Return the number of cycles needed to execute this operation
+        :return the number of cycles needed to execute this operation
         '''
 
-        def do_shift_left(val):
-            most_significant_bit = get_bit_val(val, 7)
-            res = val << 1
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_carry_flag(most_significant_bit == 1)
-            self._update_half_carry_flag(False)
-            self._update_sub_flag(False)
+        registers = self.registers
+        val = self._read_operand(opcode.code)
+        # The carry flag (bit 4 of F) shifted up to bit 16 selects the with carry half of the table
+        carry = (registers[REG_F] & FLAG_CARRY) << 12 if with_carry else 0
 
-            return res & 0xFF
-
-        # match opcode.code:
-        if opcode.code == 0x20: self.bc.hi = do_shift_left(self.bc.hi)
-        elif opcode.code == 0x21: self.bc.lo = do_shift_left(self.bc.lo)
-        elif opcode.code == 0x22: self.de.hi = do_shift_left(self.de.hi)
-        elif opcode.code == 0x23: self.de.lo = do_shift_left(self.de.lo)
-        elif opcode.code == 0x24: self.hl.hi = do_shift_left(self.hl.hi)
-        elif opcode.code == 0x25: self.hl.lo = do_shift_left(self.hl.lo)
-        elif opcode.code == 0x26:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_shift_left(val))
-        elif opcode.code == 0x27: self.af.hi = do_shift_left(self.af.hi)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        packed = SUB_TABLE[carry | (registers[REG_A] << 8) | val]
+        registers[REG_A] = packed & 0xFF
+        registers[REG_F] = packed >> 8
 
         return opcode.cycles
 
-    def _do_shift_right(self, opcode: OpCode, maintain_msb=False) -> int:
+    def _do_sub_8_bit_with_carry(self, opcode: OpCode) -> int:
         '''
-        Shift register bits right into carry flag, Most significant bit should be 0
+        Performs an 8-bit sub operation including the carry flag (SBC)
 
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_shift_right(val):
-            most_significant_bit = get_bit_val(val, 7)
-            least_significant_bit = get_bit_val(val, 0)
-            res = val >> 1
-            if maintain_msb:
-                res |= (most_significant_bit << 7)
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_carry_flag(least_significant_bit == 1)
-            self._update_half_carry_flag(False)
-            self._update_sub_flag(False)
+        return self._do_sub_8_bit(opcode, with_carry=True)
 
-            return res & 0xFF
+    def _do_unknown(self, opcode: OpCode) -> int:
+        '''
+        Handler for any opcode that doesn't map to a known operation
+        '''
 
-        # match opcode.code:
-        if opcode.code == 0x28: self.bc.hi = do_shift_right(self.bc.hi)
-        elif opcode.code == 0x29: self.bc.lo = do_shift_right(self.bc.lo)
-        elif opcode.code == 0x2A: self.de.hi = do_shift_right(self.de.hi)
-        elif opcode.code == 0x2B: self.de.lo = do_shift_right(self.de.lo)
-        elif opcode.code == 0x2C: self.hl.hi = do_shift_right(self.hl.hi)
-        elif opcode.code == 0x2D: self.hl.lo = do_shift_right(self.hl.lo)
-        elif opcode.code == 0x2E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_shift_right(val))
-        elif opcode.code == 0x2F: self.af.hi = do_shift_right(self.af.hi)
-        elif opcode.code == 0x38: self.bc.hi = do_shift_right(self.bc.hi)
-        elif opcode.code == 0x39: self.bc.lo = do_shift_right(self.bc.lo)
-        elif opcode.code == 0x3A: self.de.hi = do_shift_right(self.de.hi)
-        elif opcode.code == 0x3B: self.de.lo = do_shift_right(self.de.lo)
-        elif opcode.code == 0x3C: self.hl.hi = do_shift_right(self.hl.hi)
-        elif opcode.code == 0x3D: self.hl.lo = do_shift_right(self.hl.lo)
-        elif opcode.code == 0x3E:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_shift_right(val))
-        elif opcode.code == 0x3F: self.af.hi = do_shift_right(self.af.hi)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
 
-        return opcode.cycles
-
-    def _do_sub_8_bit(self, opcode: OpCode, with_carry=False) -> int:
+    def _do_xor(self, opcode: OpCode) -> int:
         '''
-        Performs an 8-bit sub operation and stores result in A, setting appropriate flags
+        Performs the OR operation and sets appropriate status flags
 
         :return the number of cycles needed to execute this operation
         '''
 
-        def do_sub(val_1: int, val_2: int) -> int:
-            carry = 1 if with_carry and self._is_carry_flag_set() else 0
-            res = val_1 - val_2 - carry
-            res = res if res >= 0 else 256 + res
-
-            self._update_zero_flag(res & 0xFF == 0)
-            self._update_sub_flag(True)
-            self._update_carry_flag(val_1 < val_2 + carry)
-            self._update_half_carry_flag((val_1 & 0xF) < (val_2 & 0xF) + carry)
-
-            return res
-
-        # match opcode.code:
-        if opcode.code == 0x90: self.af.hi = do_sub(self.af.hi, self.bc.hi)
-        elif opcode.code == 0x91: self.af.hi = do_sub(self.af.hi, self.bc.lo)
-        elif opcode.code == 0x92: self.af.hi = do_sub(self.af.hi, self.de.hi)
-        elif opcode.code == 0x93: self.af.hi = do_sub(self.af.hi, self.de.lo)
-        elif opcode.code == 0x94: self.af.hi = do_sub(self.af.hi, self.hl.hi)
-        elif opcode.code == 0x95: self.af.hi = do_sub(self.af.hi, self.hl.lo)
-        elif opcode.code == 0x96: self.af.hi = do_sub(self.af.hi, self._read_memory(self.hl.value))
-        elif opcode.code == 0x97: self.af.hi = do_sub(self.af.hi, self.af.hi)
-        elif opcode.code == 0x98: self.af.hi = do_sub(self.af.hi, self.bc.hi)
-        elif opcode.code == 0x99: self.af.hi = do_sub(self.af.hi, self.bc.lo)
-        elif opcode.code == 0x9A: self.af.hi = do_sub(self.af.hi, self.de.hi)
-        elif opcode.code == 0x9B: self.af.hi = do_sub(self.af.hi, self.de.lo)
-        elif opcode.code == 0x9C: self.af.hi = do_sub(self.af.hi, self.hl.hi)
-        elif opcode.code == 0x9D: self.af.hi = do_sub(self.af.hi, self.hl.lo)
-        elif opcode.code == 0x9E: self.af.hi = do_sub(self.af.hi, self._read_memory(self.hl.value))
-        elif opcode.code == 0x9F: self.af.hi = do_sub(self.af.hi, self.af.hi)
-        elif opcode.code == 0xD6: self.af.hi = do_sub(self.af.hi, self._get_next_byte())
-        elif opcode.code == 0xDE: self.af.hi = do_sub(self.af.hi, self._get_next_byte())
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
+        val = self.registers[REG_A] ^ self._read_operand(opcode.code)
+        self.registers[REG_A] = val
+        self.registers[REG_F] = FLAG_ZERO if val == 0 else 0
 
         return opcode.cycles
 
-    def _do_swap(self, opcode: OpCode) -> int:
+    def start_debug_log(self, path: str = "debug.txt"):
         '''
-        Do swap operation, swapping upper and lower nibbles of value
+        Log the registers and the next few bytes at PC to a file before every instruction, for
+        comparing against a trace from a known good emulator. The file is opened once and
+        buffered, call stop_debug_log to flush and close it
         '''
 
-        def do_swap(val):
-            res = ((val & 0xF) << 4) | (val >> 4)
-            self._update_zero_flag(res == 0)
-            self._update_sub_flag(False)
-            self._update_carry_flag(False)
-            self._update_half_carry_flag(False)
-            return res
-
-        # match opcode.code:
-        if opcode.code == 0x30: self.bc.hi = do_swap(self.bc.hi)
-        elif opcode.code == 0x31: self.bc.lo = do_swap(self.bc.lo)
-        elif opcode.code == 0x32: self.de.hi = do_swap(self.de.hi)
-        elif opcode.code == 0x33: self.de.lo = do_swap(self.de.lo)
-        elif opcode.code == 0x34: self.hl.hi = do_swap(self.hl.hi)
-        elif opcode.code == 0x35: self.hl.lo = do_swap(self.hl.lo)
-        elif opcode.code == 0x36:
-            self._sync_cycles(4)
-            val = self._read_memory(self.hl.value)
-            self._sync_cycles(4)
-            self._write_memory(self.hl.value, do_swap(val))
-        elif opcode.code == 0x37: self.af.hi = do_swap(self.af.hi)
-        else: raise Exception(f"Unknown prefix operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
-        return opcode.cycles
+        self.stop_debug_log()
+        self.debug_file = open(path, "a", buffering=1 << 20)
 
-    def _do_xor(self, opcode: OpCode) -> int:
+    def stop_debug_log(self):
         '''
-        Performs the OR operation and sets appropriate status flags
-
-        :return the number of cycles needed to execute this operation
+        Stop logging instructions, flushing and closing the debug log if one is open
         '''
 
-        # match opcode.code:
-        if opcode.code == 0xA8:
-            self.af.hi ^= self.bc.hi
-            val = self.af.hi
-        elif opcode.code == 0xA9:
-            self.af.hi ^= self.bc.lo
-            val = self.af.hi
-        elif opcode.code == 0xAA:
-            self.af.hi ^= self.de.hi
-            val = self.af.hi
-        elif opcode.code == 0xAB:
-            self.af.hi ^= self.de.lo
-            val = self.af.hi
-        elif opcode.code == 0xAC:
-            self.af.hi ^= self.hl.hi
-            val = self.af.hi
-        elif opcode.code == 0xAD:
-            self.af.hi ^= self.hl.lo
-            val = self.af.hi
-        elif opcode.code == 0xAE:
-            self.af.hi ^= self._read_memory(self.hl.value)
-            val = self.af.hi
-        elif opcode.code == 0xAF:
-            self.af.hi ^= self.af.hi
-            val = self.af.hi
-        elif opcode.code == 0xEE:
-            self.af.hi ^= self._get_next_byte()
-            val = self.af.hi
-        else: raise Exception(f"Unknown operation encountered 0x{format(opcode.code, '02x')} - {opcode.mnemonic}")
-
-        self._update_zero_flag(val == 0)
-        self._update_half_carry_flag(False)
-        self._update_sub_flag(False)
-        self._update_carry_flag(False)
-
-        return opcode.cycles
+        if self.debug_file is not None:
+            self.debug_file.close()
+            self.debug_file = None
 
-    # flake8: noqa: E741 E501
     def _debug(self):
-        a = format(self.af.hi, '02X')
-        f = format(self.af.lo, '02X')
-        b = format(self.bc.hi, '02X')
-        c = format(self.bc.lo, '02X')
-        d = format(self.de.hi, '02X')
-        e = format(self.de.lo, '02X')
-        h = format(self.hl.hi, '02X')
-        l = format(self.hl.lo, '02X')
-        af = format(self.af.value, '04X')
-        bc = format(self.bc.value, '04X')
-        de = format(self.de.value, '04X')
-        hl = format(self.hl.value, '04X')
-        sp = format(self.stack_pointer, '04X')
-        pc = format(self.program_counter, '04X')
-
-        pc_1 = format(self._read_memory(self.program_counter), '02X')
-        pc_2 = format(self._read_memory(self.program_counter + 1), '02X')
-        pc_3 = format(self._read_memory(self.program_counter + 2), '02X')
-        pc_4 = format(self._read_memory(self.program_counter + 3), '02X')
-
-        with open("debug.txt", "a") as debug_file:
-            debug_file.write(f'A: {a} F: {f} B: {b} C: {c} D: {d} E: {e} H: {h} L: {l} SP: {sp} PC: 00:{pc} ({pc_1} {pc_2} {pc_3} {pc_4})\n')
-
-        # with open("debug.txt", "a") as debug_file:
-        #     debug_file.write(f"AF: {af} BC: {bc} DE: {de} HL: {hl} {format(self.program_counter, '04X')} - {opcode.mnemonic}\n")
-
-        # with open("debug.txt", "a") as debug_file:
-        #     debug_file.write(f'SP: {sp} PC: 00:{pc} ({pc_1} {pc_2} {pc_3} {pc_4})\n')
\ No newline at end of file
+        registers = self.registers
+        pc = self.program_counter
+
+        # Read the bytes at PC straight from the MMU, logging shouldn't sync the other components
+        read_byte = self.read_byte
+        pc_1 = HEX_BYTES[read_byte(pc)]
+        pc_2 = HEX_BYTES[read_byte((pc + 1) & 0xFFFF)]
+        pc_3 = HEX_BYTES[read_byte((pc + 2) & 0xFFFF)]
+        pc_4 = HEX_BYTES[read_byte((pc + 3) & 0xFFFF)]
+
+        self.debug_file.write(
+            f'A: {HEX_BYTES[registers[REG_A]]} F: {HEX_BYTES[registers[REG_F]]} B: {HEX_BYTES[registers[REG_B]]} '
+            f'C: {HEX_BYTES[registers[REG_C]]} D: {HEX_BYTES[registers[REG_D]]} E: {HEX_BYTES[registers[REG_E]]} '
+            f'H: {HEX_BYTES[registers[REG_H]]} L: {HEX_BYTES[registers[REG_L]]} SP: {self.stack_pointer:04X} '
+            f'PC: 00:{pc:04X} ({pc_1} {pc_2} {pc_3} {pc_4})\n'
+        )
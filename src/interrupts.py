@@ -3,11 +3,21 @@ from mmu import Mmu
 from utils import Interrupt, is_bit_set, set_bit
 
 
+# The interrupt to service for each combination of pending (enabled and requested) interrupts.
+# Lower bits have higher priority, so this is the lowest set bit of the index
+SERVICE_ORDER = tuple(
+    next((interrupt for interrupt in Interrupt if pending & (1 << interrupt.value)), None)
+    for pending in range(1 << len(Interrupt))
+)
+
+
 class InterruptControl:
     '''
     A general purpose class to control interrupt logic for PyBoy
     '''
 
+    __slots__ = ('mmu',)
+
     def __init__(self, mmu: Mmu):
         self.mmu = mmu
 
@@ -18,17 +28,12 @@ class InterruptControl:
         :return the number of cycles necessary to perform a service
         '''
 
-        interrupts = [i for i in Interrupt]
-        interrupts.sort()
-
-        # Interrupts are serviced in order of priority, as defined in their bit values
-        for interrupt in interrupts:
-
-            # if the interrupt is requested and enabled, we can tell the CPU to handle it
-            if self.is_interrupt_enabled(interrupt) and self.is_interrupt_requested(interrupt):
-                return interrupt
+        # This is checked after every instruction, so test every interrupt at once - if one is
+        # requested and enabled, we can tell the CPU to handle the one with the highest priority
+        read_byte = self.mmu.read_byte
+        pending = read_byte(INTERRUPT_ENABLE_ADDR) & read_byte(INTERRUPT_FLAG_ADDR) & 0x1F
 
-        return None
+        return SERVICE_ORDER[pending]
 
     def request_interrupt(self, interrupt: Interrupt):
         '''
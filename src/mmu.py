@@ -6,6 +6,8 @@ from constants import (
     JOYPAD_REGISTER_ADDR,
     MAXIMUM_RAM_BANKS,
     RAM_BANK_SIZE,
+    SERIAL_TRANSFER_CONTROL_ADDR,
+    SERIAL_TRANSFER_DATA_ADDR,
     TIMER_ADDR,
     TIMER_CONTROL_ADDR
 )
@@ -37,11 +39,32 @@ class Mmu:
 
     MEMORY_SIZE = 0x10000
 
+    # The MMU is accessed on nearly every instruction, fixed slots keep its attribute lookups cheap
+    __slots__ = (
+        'joypad',
+        'memory',
+        'ram_banks',
+        'enable_ram',
+        'oam_access',
+        'color_pallette_access',
+        'vram_access',
+        'rom_bank',
+        'rom_bank_offset',
+        'mbc1',
+        'mbc2',
+        'number_of_rom_banks',
+        'rom',
+        'rom_data',
+        'timer_frequency_changed',
+        'serial_hook',
+    )
+
     def __init__(self, joypad: Joypad):
 
         self.joypad = joypad
 
-        self.memory = [0 for _ in range(self.MEMORY_SIZE)]
+        # Backed by a bytearray so the CPU can index it directly for instruction fetches
+        self.memory = bytearray(self.MEMORY_SIZE)
 
         # RAM banks to be used for external RAM
         self.ram_banks = [0 for _ in range(MAXIMUM_RAM_BANKS * RAM_BANK_SIZE)]
@@ -54,8 +77,10 @@ class Mmu:
         self.color_pallette_access = True  # TODO CGB only
         self.vram_access = True
 
-        # Default current ROM bank to 1
+        # Default current ROM bank to 1. The offset is what to add to an address in 4000 - 7FFF
+        # to find it in the ROM data, kept up to date so reads don't need to work it out
         self.rom_bank = 1
+        self.rom_bank_offset = 0
 
         # MBC modes
         self.mbc1 = False
@@ -66,9 +91,13 @@ class Mmu:
         self.reset()
 
         self.rom = None
+        self.rom_data = b''
 
         self.timer_frequency_changed = False
 
+        # Called with each byte sent over the serial port, if set (i.e. to print Blargg test output)
+        self.serial_hook = None
+
     def reset(self):
         '''
         Reset state of MMU
@@ -109,7 +138,7 @@ class Mmu:
         # THis iniital state of the joypad is all unpressed
         self.memory[JOYPAD_REGISTER_ADDR] = 0xFF
 
-        self.rom_bank = 1
+        self._select_rom_bank(1)
 
         # TEMP
         # self.memory[0xFF44] = 0x90
@@ -121,25 +150,27 @@ class Mmu:
         TODO deal with addresses on case basis - basically need to deal with MBC modes
         '''
 
-        is_reading_restricted_oam = addr >= 0xFE00 and addr <= 0xFE9F and not self.oam_access
-        is_reading_restricted_vram = addr >= 0x8000 and addr <= 0x9FFF and not self.vram_access
+        # Work out the region once, most reads are from ROM
+        if addr < 0x4000:
+            return self.memory[addr]
 
-        if is_reading_restricted_oam or is_reading_restricted_vram:
-            # Reading something currently restricted, return garbage (0xFF)
-            return 0xFF
-        else:
+        if addr < 0x8000:
+            # First ROM bank will always be mapped into memory, but anything in this range might
+            # use a different bank, so let's find the appropriate bank to read from
+            return self.rom_data[addr + self.rom_bank_offset]
 
-            if addr >= 0x4000 and addr < 0x8000:
-                # First ROM bank will always be mapped into memory, but anything in this range might
-                # use a different bank, so let's find the appropriate bank to read from
-                resolved_addr = (addr - 0x4000) + (self.rom_bank * 0x4000)
-                return self.rom.data[resolved_addr]
-            else:
+        if addr < 0xA000:
+            # Reading VRAM while it is restricted returns garbage (0xFF)
+            return self.memory[addr] if self.vram_access else 0xFF
+
+        if 0xFE00 <= addr <= 0xFE9F and not self.oam_access:
+            # Reading OAM while it is restricted returns garbage (0xFF)
+            return 0xFF
 
-                if addr >= 0xA000 and addr < 0xC000:
-                    print("RAM BANKED")
+        if addr < 0xC000:
+            print("RAM BANKED")
 
-                return self.memory[addr]
+        return self.memory[addr]
 
     def write_byte(self, addr: int, data: int):
         '''
@@ -188,11 +219,16 @@ class Mmu:
         elif addr == 0xFF46:
             self._do_dma_transfer(data)
 
+        elif addr == SERIAL_TRANSFER_DATA_ADDR:
+            self.memory[addr] = data & 0xFF
+            if self.serial_hook is not None and self.memory[SERIAL_TRANSFER_CONTROL_ADDR] == 0x81:
+                self.serial_hook(data)
+
         elif addr == TIMER_CONTROL_ADDR:
             # If we are changing the data of the timer controller, then the timer itself will need
             # to reset to count at the new frequency being set here
             self.update_timer_frequency_changed(True)
-            self.memory[addr] = data
+            self.memory[addr] = data & 0xFF
 
         else:
             self.memory[addr] = data & 0xFF
@@ -203,10 +239,10 @@ class Mmu:
         '''
 
         self.rom = rom
+        self.rom_data = rom.data
 
-        end_addr = 0x8000
-        for i in range(min(end_addr, len(rom.data))):
-            self.memory[i] = rom.data[i]
+        end_addr = min(0x8000, len(rom.data))
+        self.memory[:end_addr] = rom.data[:end_addr]
 
         # Select proper MBC mode
         # TODO this is not clean - might be better way to do this
@@ -331,7 +367,7 @@ class Mmu:
                     print("BANK")
 
                 # Preserve the high bits and set the lower 5 bits
-                self.rom_bank = (self.rom_bank & 0b11100000) | new_rom_bank
+                self._select_rom_bank((self.rom_bank & 0b11100000) | new_rom_bank)
 
         elif addr >= 0x4000 and addr < 0x6000:
             # TODO deal with other bits for MBC 1
@@ -343,6 +379,14 @@ class Mmu:
             # pass
             print("BANK MODE")
 
+    def _select_rom_bank(self, bank: int):
+        '''
+        Switch the ROM bank mapped into 4000 - 7FFF
+        '''
+
+        self.rom_bank = bank
+        self.rom_bank_offset = (bank - 1) * 0x4000
+
     def _do_dma_transfer(self, data: int):
         '''
         When writing to register 0xFF46, copy data from RAM/ROM to Object Attribute
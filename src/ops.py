@@ -1,7 +1,9 @@
-from enum import Enum
+class Operation:
+    '''
+    The operations an opcode can perform. These are plain ints rather than an Enum so that
+    comparing and hashing them while executing instructions is as cheap as possible
+    '''
 
-
-class Operation(Enum):
     LD = 0
     ADD = 2
     ADC = 3
@@ -50,11 +52,14 @@ class Operation(Enum):
     PUSH = 45
     PREFIX = 46
     LDH = 47
+    ILLEGAL = 48
 
 
 class OpCode:
 
-    def __init__(self, code: int, mnemonic: str, operation: Operation, len: int, cycles: int, alt_cycles: int = None):
+    __slots__ = ('code', 'mnemonic', 'operation', 'len', 'cycles', 'alt_cycles')
+
+    def __init__(self, code: int, mnemonic: str, operation: int, len: int, cycles: int, alt_cycles: int = None):
         self.code = code
         self.mnemonic = mnemonic
         self.operation = operation
@@ -611,18 +616,31 @@ prefix_opcodes = [
     OpCode(0xFF, "SET 7, A", Operation.SET, 2, 8),
 ]
 
-opcodes_map = {opcode.code: opcode for opcode in opcodes}
-prefix_opcodes_map = {opcode.code: opcode for opcode in prefix_opcodes}
+
+def _build_opcode_table(opcodes: "list[OpCode]") -> "tuple[OpCode, ...]":
+    '''
+    Build a table of opcodes indexed by their code. Codes that are not a valid instruction get
+    an ILLEGAL placeholder, so the table can always be indexed directly by the byte read from memory
+
+    :return a tuple of 256 opcodes
+    '''
+
+    table = [OpCode(code, "ILLEGAL", Operation.ILLEGAL, 1, 0) for code in range(0x100)]
+    for opcode in opcodes:
+        table[opcode.code] = opcode
+
+    return tuple(table)
+
+
+opcodes_map = _build_opcode_table(opcodes)
+prefix_opcodes_map = _build_opcode_table(prefix_opcodes)
 
 
 def debug_ops():
     for i in range(0x10):
         for j in range(0x10):
             code = i << 4 | j
-            if code in opcodes_map:
-                print(f'{int(opcodes_map[code].alt_cycles/4)}', end=",")
-            else:
-                print(0, end=",")
+            print(f'{int(opcodes_map[code].alt_cycles/4)}', end=",")
 
         print("")
 
@@ -631,9 +649,6 @@ def debug_ops():
     for i in range(0x10):
         for j in range(0x10):
             code = i << 4 | j
-            if code in prefix_opcodes_map:
-                print(f'{int(prefix_opcodes_map[code].alt_cycles/4)}', end=",")
-            else:
-                print(0, end=",")
+            print(f'{int(prefix_opcodes_map[code].alt_cycles/4)}', end=",")
 
         print("")
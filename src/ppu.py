@@ -17,7 +17,7 @@ from constants import (
 )
 from interrupts import InterruptControl
 from mmu import Mmu
-from utils import Interrupt, get_bit_val, is_bit_set, LcdMode, reset_bit, set_bit
+from utils import Interrupt, is_bit_set, LcdMode
 
 
 class LcdControl:
@@ -141,9 +141,8 @@ class LcdStatus:
         Returns the current LCD mode from the Status register
         '''
 
-        msb = get_bit_val(self.memory.read_byte(LCD_STATUS_ADDR), 1)
-        lsb = get_bit_val(self.memory.read_byte(LCD_STATUS_ADDR), 0)
-        lcd_mode = msb << 1 | lsb
+        # The mode is held in the lower 2 bits
+        lcd_mode = self.memory.read_byte(LCD_STATUS_ADDR) & 0x3
 
         # match lcd_mode:
         if lcd_mode == 0:
@@ -193,9 +192,9 @@ class LcdStatus:
 
         status = self.get_status()
         if val:
-            status = set_bit(status, 2)
+            status |= 0x04
         else:
-            status = reset_bit(status, 2)
+            status &= 0xFB
 
         self.set_status(status)
 
@@ -237,6 +236,9 @@ class Ppu:
         # It takes 456 clock cycles to draw one scanline
         self.scanline_counter = CYCLES_PER_SCANLINE
 
+        # The scanline the LCD status was last updated for
+        self.status_scanline = -1
+
         # Create an array to hold the state of the LCD
         self.screen = [[0 for _ in range(SCREEN_HEIGHT)] for _ in range(SCREEN_WIDTH)]
 
@@ -283,6 +285,26 @@ class Ppu:
             else:
                 self.draw_scanline()
 
+    def cycles_until_next_event(self) -> int:
+        '''
+        Get the number of cycles that can pass before updating the graphics has any effect. This is
+        the end of the current scanline, unless the LCD status needs to be updated for a new scanline
+        or LY matches LYC, in which case we need to update straight away
+
+        :return the number of cycles until the graphics next need to be updated
+        '''
+
+        if not self.lcd_control.is_lcd_enabled():
+            return MAX_CYCLES_PER_FRAME
+
+        scanline = self.memory.read_byte(CURRENT_SCANLINE_ADDR)
+        scanline_compare = self.memory.read_byte(CURRENT_SCANLINE_COMPARE_ADDR)
+
+        if scanline != self.status_scanline or scanline == scanline_compare:
+            return 0
+
+        return self.scanline_counter
+
     def update_lcd_status(self):
         '''
         Update LCD status to ensure we are correctly drawing graphics depending on the
@@ -292,6 +314,8 @@ class Ppu:
         scanline = self.memory.read_byte(CURRENT_SCANLINE_ADDR)
         scanline_compare = self.memory.read_byte(CURRENT_SCANLINE_COMPARE_ADDR)
 
+        self.status_scanline = scanline
+
         # TODO do i need this??
         if not self.lcd_control.is_lcd_enabled():
             # LCD is disabled, this means we are in VBlank, so reset scanline
@@ -405,9 +429,7 @@ class Ppu:
 
             # Loop through pixels left to right as that's the order in the tile (bit 7 - 0)
             for i in range(7, -1, -1):
-                least_significant_bit = get_bit_val(byte_1, i)
-                most_significant_bit = get_bit_val(byte_2, i)
-                color_id = (most_significant_bit << 1) | least_significant_bit
+                color_id = (((byte_2 >> i) & 1) << 1) | ((byte_1 >> i) & 1)
                 color = self._get_color_from_id(color_id)
                 line.append(color)
 
@@ -528,9 +550,7 @@ class Ppu:
         The ID will later be mapped onto the palette to get the right color
         '''
 
-        least_significant_bit = get_bit_val(tile_data_low, bit)
-        most_significant_bit = get_bit_val(tile_data_high, bit)
-        return self._get_color_from_id((most_significant_bit << 1) | least_significant_bit)
+        return self._get_color_from_id((((tile_data_high >> bit) & 1) << 1) | ((tile_data_low >> bit) & 1))
 
     def _get_color_from_id(self, color_id: int):
         '''
@@ -544,18 +564,11 @@ class Ppu:
         # Bit 5-4 - Color for index 2
         # Bit 3-2 - Color for index 1
         # Bit 1-0 - Color for index 0
-        # match color_id:
-        if color_id == 3:
-            color = get_bit_val(pallette, 7) << 1 | get_bit_val(pallette, 6)
-        elif color_id == 2:
-            color = get_bit_val(pallette, 5) << 1 | get_bit_val(pallette, 4)
-        elif color_id == 1:
-            color = get_bit_val(pallette, 3) << 1 | get_bit_val(pallette, 2)
-        elif color_id == 0:
-            color = get_bit_val(pallette, 1) << 1 | get_bit_val(pallette, 0)
-        else:
+        if color_id > 3:
             raise Exception(f"Invalid color_id - {color_id}")
 
+        color = (pallette >> (color_id * 2)) & 0x3
+
         return GB_COLORS[color]
 
     def _render_background(self):
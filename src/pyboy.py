@@ -10,6 +10,7 @@ from joypad import Joypad
 from mmu import Mmu
 from ppu import Ppu
 from rom import Rom
+from scheduler import Scheduler
 from timers import TimerControl
 from utils import Button
 
@@ -25,7 +26,11 @@ class PyBoy:
         self.interrupts = InterruptControl(self.mmu)
         self.timers = TimerControl(self.mmu, self.interrupts)
         self.ppu = Ppu(self.mmu, self.interrupts)
-        self.cpu = Cpu(self.mmu, self.timers, self.ppu)
+        self.scheduler = Scheduler(self.timers, self.ppu)
+        self.cpu = Cpu(self.mmu, self.scheduler, self.interrupts)
+
+        # Print anything sent over serial, this is how the Blargg test ROMs report results
+        self.mmu.serial_hook = self.print_serial
 
         self.rom = None
 
@@ -42,22 +47,17 @@ class PyBoy:
             print("No ROM loaded")
             return
 
-        frame_cycles = 0
-
         try:
             # Execute a frame based on number of cycles we expect per frame
-            while frame_cycles < MAX_CYCLES_PER_FRAME:
-                cycles = self.cpu.execute()
-                frame_cycles += cycles
-
-                interrupt = self.interrupts.get_servicable_interrupt()
-                if interrupt is not None:
-                    self.cpu.service_interrupt(interrupt)
+            self.cpu.run_frame(MAX_CYCLES_PER_FRAME)
 
         except Exception as e:
             logger.exception(e)
             self.exit(1)
 
+    def print_serial(self, data: int):
+        print(chr(data), end="")
+
     def get_screen(self):
         return self.ppu.get_screen()
 
@@ -70,10 +70,10 @@ class Rom:
         # We shouldn't get here but if we do, just assume no extra banks
         return 2
 
-    def _load_data(self, file: str):
-        with open("%s" % file, "rb") as f:
-            data = []
-            for byte in iter(lambda: f.read(1), b''):
-                data.append(byte)
+    def _load_data(self, file: str) -> bytes:
+        '''
+        Read the whole ROM in one go. Indexing the bytes gives ints, just like a list would
+        '''
 
-            return [int.from_bytes(d, "big") for d in data]
+        with open("%s" % file, "rb") as f:
+            return f.read()
@@ -0,0 +1,63 @@
+from ppu import Ppu
+from timers import TimerControl
+
+
+class Scheduler:
+    '''
+    Keeps the timers and PPU in step with the CPU. Rather than updating every component after
+    each instruction, cycles are accumulated until one of the components has an event due (i.e.
+    a timer overflow or the end of a scanline) or the CPU touches an I/O register, at which point
+    all the components are caught up at once
+    '''
+
+    # Cycles are added after every instruction, fixed slots keep the attribute lookups cheap
+    __slots__ = ('timer', 'ppu', 'pending_cycles', 'next_event_cycles')
+
+    def __init__(self, timer: TimerControl, ppu: Ppu):
+        self.timer = timer
+        self.ppu = ppu
+
+        # Cycles the CPU has run that the components have not caught up on yet
+        self.pending_cycles = 0
+
+        # Once this many cycles are pending, an event is due and we need to catch up
+        self.next_event_cycles = 0
+
+    def add_cycles(self, cycles: int):
+        '''
+        Account for cycles run by the CPU, catching up the components if an event is due
+        '''
+
+        self.pending_cycles += cycles
+        if self.pending_cycles >= self.next_event_cycles:
+            self.sync()
+
+    def cycles_until_next_event(self) -> int:
+        '''
+        Get the number of cycles that can be added before the next event is due
+
+        :return the number of cycles until the next event
+        '''
+
+        return self.next_event_cycles - self.pending_cycles
+
+    def sync(self):
+        '''
+        Catch the components up on all pending cycles and work out when the next event is due
+        '''
+
+        cycles = self.pending_cycles
+        self.pending_cycles = 0
+
+        self.timer.update_timers(cycles)
+        self.ppu.update_graphics(cycles)
+
+        self.next_event_cycles = min(self.timer.cycles_until_next_event(), self.ppu.cycles_until_next_event())
+
+    def invalidate(self):
+        '''
+        Component state was changed from outside (i.e. the CPU wrote to an I/O register) so the
+        next event may have moved. Catch up as soon as any more cycles are added
+        '''
+
+        self.next_event_cycles = 0
@@ -1,4 +1,11 @@
-from constants import CLOCK_SPEED, CYCLES_PER_DIVIDER_INCREMENT, TIMER_ADDR, TIMER_CONTROL_ADDR, TIMER_MODULATOR_ADDR
+from constants import (
+    CYCLES_PER_DIVIDER_INCREMENT,
+    MAX_CYCLES_PER_FRAME,
+    TIMER_ADDR,
+    TIMER_CONTROL_ADDR,
+    TIMER_CYCLE_PERIODS,
+    TIMER_MODULATOR_ADDR
+)
 from interrupts import InterruptControl
 from mmu import Mmu
 from utils import Interrupt, is_bit_set
@@ -60,17 +67,21 @@ class TimerControl:
         of the TAC (Timer control) register
         '''
 
-        freq_compare_val = self.mmu.read_byte(TIMER_CONTROL_ADDR) & 0x3
-
         # These values are taken from the Pan Docs
-        if freq_compare_val == 0:
-            return int(CLOCK_SPEED / 4096)
-        elif freq_compare_val == 1:
-            return int(CLOCK_SPEED / 262144)
-        elif freq_compare_val == 2:
-            return int(CLOCK_SPEED / 65536)
-        else:
-            return int(CLOCK_SPEED / 16384)
+        return TIMER_CYCLE_PERIODS[self.mmu.read_byte(TIMER_CONTROL_ADDR) & 0x3]
+
+    def cycles_until_next_event(self) -> int:
+        '''
+        Get the number of cycles that can pass before the timer overflows and requests an interrupt
+
+        :return the number of cycles until the timer next needs to be updated
+        '''
+
+        if not self.is_timer_enabled():
+            return MAX_CYCLES_PER_FRAME
+
+        increments_until_overflow = 0x100 - self.mmu.read_byte(TIMER_ADDR)
+        return increments_until_overflow * self.get_timer_frequency() - self.timer_counter
 
     def update_divider_register(self, cycles: int):
         '''
@@ -78,6 +89,6 @@ class TimerControl:
         '''
 
         self.divider_counter -= cycles
-        if self.divider_counter <= 0:
+        while self.divider_counter <= 0:
             self.divider_counter += CYCLES_PER_DIVIDER_INCREMENT
             self.mmu.increment_divider_register()
@@ -48,8 +48,7 @@ def set_bit(data: int, position: int) -> int:
 
 
 def reset_bit(data: int, position: int) -> int:
-    setter = bit_negate(1 << position)
-    return data & setter
+    return data & (0xFF ^ (1 << position))
 
 
 def get_bit_val(data: int, position: int) -> int:
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+
+from collections import Counter
+
+# The emulator's modules live flat in src/ and import each other by name, the same as when
+# running src/pyboy.py directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ops import opcodes_map, prefix_opcodes_map  # noqa: E402
+from pyboy import PyBoy  # noqa: E402
+
+DEFAULT_HISTOGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opcode_histogram.json')
+
+
+def count_opcodes(pyboy: PyBoy, counts: Counter, prefix_counts: Counter):
+    '''
+    Wrap each of the CPU's instruction handlers so that every opcode executed is counted.
+    CB prefixed opcodes are counted separately by peeking at the byte following the prefix
+    '''
+
+    cpu = pyboy.cpu
+
+    def wrap(code, handler):
+        def counted(opcode):
+            counts[code] += 1
+            return handler(opcode)
+
+        return counted
+
+    def wrap_prefix(handler):
+        def counted(opcode):
+            counts[0xCB] += 1
+            prefix_counts[cpu._read_memory(cpu.program_counter)] += 1
+            return handler(opcode)
+
+        return counted
+
+    cpu.handlers = [
+        wrap_prefix(handler) if code == 0xCB else wrap(code, handler)
+        for code, handler in enumerate(cpu.handlers)
+    ]
+
+
+def print_counts(title: str, counts: Counter, table):
+    '''
+    Print out the opcodes executed, most frequent first
+    '''
+
+    total = sum(counts.values())
+
+    print(f"\n{title} - {total} executed\n")
+    for code, count in counts.most_common():
+        print(f"0x{format(code, '02X')}  {table[code].mnemonic:<16} {count:>10}  {count / total:7.2%}")
+
+
+def histogram(counts: Counter, table) -> "list[dict]":
+    '''
+    Get the opcodes executed, most frequent first, in a form that can be written out as JSON
+
+    :return a list with the code, mnemonic and count of each opcode executed
+    '''
+
+    return [
+        {'code': f"0x{format(code, '02X')}", 'mnemonic': table[code].mnemonic, 'count': count}
+        for code, count in counts.most_common()
+    ]
+
+
+def main(rom, frames, output):
+    counts = Counter()
+    prefix_counts = Counter()
+
+    pyboy = PyBoy()
+    pyboy.load_game(rom)
+
+    count_opcodes(pyboy, counts, prefix_counts)
+
+    for _ in range(frames):
+        pyboy.run()
+
+    print_counts("Opcodes", counts, opcodes_map)
+    print_counts("CB Prefixed Opcodes", prefix_counts, prefix_opcodes_map)
+
+    with open(output, 'w') as histogram_file:
+        json.dump(
+            {
+                'rom': os.path.basename(rom),
+                'frames': frames,
+                'opcodes': histogram(counts, opcodes_map),
+                'prefix_opcodes': histogram(prefix_counts, prefix_opcodes_map),
+            },
+            histogram_file,
+            indent=2,
+        )
+
+    print(f"\nHistogram written to {output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    # Run a ROM headless for a number of frames and report how often each opcode is executed,
+    # i.e. python tools/profile_opcodes.py <rom> [frames] [output json]
+    rom = sys.argv[1]
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    output = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_HISTOGRAM_PATH
+
+    sys.exit(main(rom, frames, output))